@@ -0,0 +1,202 @@
+import os
+import json
+import shutil
+import hashlib
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Blobs live at data/blobs/<first two hex digits>/<sha256>; snapshots, backups
+# and images are hard links to them (or copies where links are not supported)
+BLOB_DIR = Path("data") / "blobs"
+INDEX_PATH = BLOB_DIR / "index.sqlite3"
+
+_local = threading.local()
+stats = {'stored': 0, 'deduplicated': 0, 'released': 0, 'deleted': 0}
+
+
+def _connect() -> sqlite3.Connection:
+    """Per-thread connection to the reference index; the schema is created on first use."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        BLOB_DIR.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(INDEX_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # One row per file that refers to a blob; a blob's reference count is its row count
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS refs (
+                path TEXT PRIMARY KEY,
+                digest TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS refs_digest ON refs (digest)")
+        _local.conn = conn
+    return conn
+
+
+def digest_of(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+def json_bytes(data: Dict[str, Any]) -> bytes:
+    """Serialize resume data the way snapshot files have always been written."""
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def blob_path(digest: str) -> Path:
+    return BLOB_DIR / digest[:2] / digest
+
+
+def _write_blob(digest: str, payload: bytes):
+    path = blob_path(digest)
+    if path.exists():
+        stats['deduplicated'] += 1
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so a crash never leaves a truncated blob under its hash
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp, path)
+    stats['stored'] += 1
+
+
+def _materialize(digest: str, target: Path):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.exists():
+        target.unlink()
+    try:
+        os.link(blob_path(digest), target)
+    except OSError:
+        shutil.copyfile(blob_path(digest), target)
+
+
+def _drop_ref(conn: sqlite3.Connection, path: str) -> Optional[str]:
+    """Remove one reference (inside a transaction); delete the blob if it was the last."""
+    row = conn.execute("SELECT digest FROM refs WHERE path = ?", (path,)).fetchone()
+    if row is None:
+        return None
+    conn.execute("DELETE FROM refs WHERE path = ?", (path,))
+    stats['released'] += 1
+    remaining = conn.execute("SELECT COUNT(*) FROM refs WHERE digest = ?", (row[0],)).fetchone()[0]
+    if remaining == 0:
+        blob_path(row[0]).unlink(missing_ok=True)
+        stats['deleted'] += 1
+    return row[0]
+
+
+def store(target: Path, payload: bytes) -> str:
+    """Make `target` a file with this content, stored once however many files share it.
+
+    Returns the content's SHA-256. Whatever `target` referred to before is released.
+    """
+    digest = digest_of(payload)
+    key = str(target)
+    conn = _connect()
+    # The write lock serializes this with release(), so a blob is never deleted
+    # between being found and being linked
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        previous = conn.execute("SELECT digest FROM refs WHERE path = ?", (key,)).fetchone()
+        if previous and previous[0] == digest and target.exists():
+            conn.execute("COMMIT")
+            stats['deduplicated'] += 1
+            return digest
+        _write_blob(digest, payload)
+        _drop_ref(conn, key)
+        conn.execute("INSERT INTO refs (path, digest) VALUES (?, ?)", (key, digest))
+        _materialize(digest, target)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return digest
+
+
+def release(target: Path):
+    """Delete `target` and drop its reference; the blob goes when nothing refers to it."""
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _drop_ref(conn, str(target))
+        Path(target).unlink(missing_ok=True)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def digest_for(target: Path) -> Optional[str]:
+    """Content hash recorded for a stored file, or None if it was not written through the store."""
+    row = _connect().execute("SELECT digest FROM refs WHERE path = ?", (str(target),)).fetchone()
+    return row[0] if row else None
+
+
+def find_path(digest: str, directory: Path) -> Optional[Path]:
+    """An existing file in `directory` with this content, if any."""
+    rows = _connect().execute(
+        "SELECT path FROM refs WHERE digest = ? ORDER BY path DESC", (digest,)
+    ).fetchall()
+    for (path,) in rows:
+        if Path(path).parent == Path(directory) and Path(path).exists():
+            return Path(path)
+    return None
+
+
+def store_in_directory(directory: Path, filename: str, payload: bytes) -> Path:
+    """Store payload as directory/filename, or return the file there that already has this content."""
+    existing = find_path(digest_of(payload), directory)
+    if existing is not None:
+        stats['deduplicated'] += 1
+        return existing
+    target = Path(directory) / filename
+    store(target, payload)
+    return target
+
+
+def usage() -> Dict[str, int]:
+    """Files referring to blobs, distinct blobs, and bytes saved by sharing."""
+    conn = _connect()
+    files, blobs = conn.execute("SELECT COUNT(*), COUNT(DISTINCT digest) FROM refs").fetchone()
+    saved = 0
+    for digest, count in conn.execute("SELECT digest, COUNT(*) FROM refs GROUP BY digest HAVING COUNT(*) > 1"):
+        path = blob_path(digest)
+        if path.exists():
+            saved += (count - 1) * path.stat().st_size
+    return {'files': files, 'blobs': blobs, 'bytes_saved': saved, **stats}
+
+
+if __name__ == "__main__":
+    import time
+    from sample_data import SAMPLE_RESUME_DATA
+
+    BLOB_DIR = Path(tempfile.mkdtemp()) / "blobs"
+    INDEX_PATH = BLOB_DIR / "index.sqlite3"
+    root = BLOB_DIR.parent
+    payload = json_bytes(SAMPLE_RESUME_DATA)
+
+    start = time.perf_counter()
+    for i in range(200):
+        (root / "plain").mkdir(exist_ok=True)
+        (root / "plain" / f"resume_data_{i}.json").write_bytes(payload)
+        (root / "plain" / f"backup_{i}.json").write_bytes(payload)
+    plain = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(200):
+        store(root / "stored" / f"resume_data_{i}.json", payload)
+        store(root / "stored" / f"backup_{i}.json", payload)
+    stored = time.perf_counter() - start
+
+    # Uploading the same photo again, under another name, reuses the first file
+    photo = b"\x89PNG" + os.urandom(4096)
+    first = store_in_directory(root / "assets", "resume_data_1.png", photo)
+    again = store_in_directory(root / "assets", "resume_data_2.png", photo)
+    assert again == first and not (root / "assets" / "resume_data_2.png").exists(), "photo was stored twice"
+
+    print(f"🔹 400 plain writes  {plain * 1000:7.1f} ms, {400 * len(payload) / 1024:.0f} KB")
+    print(f"🔹 400 stored writes {stored * 1000:7.1f} ms, {len(payload) / 1024:.0f} KB")
+    print(f"🔹 {usage()}")
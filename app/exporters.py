@@ -0,0 +1,181 @@
+import io
+from typing import Any, Callable, Dict, List, Tuple
+
+from resume_format import prepare_resume_data
+
+# An exported section: (heading, entries); each entry has a title, an optional
+# subtitle, body text and extra "Label: value" detail lines.
+Section = Tuple[str, List[Dict[str, Any]]]
+
+
+def _entry(title: str, subtitle: str = "", body: str = "", details: List[str] = None) -> Dict[str, Any]:
+    return {'title': title, 'subtitle': subtitle, 'body': body, 'details': details or []}
+
+
+def _contact_line(personal: Dict[str, Any]) -> str:
+    fields = ['email', 'phone', 'location', 'linkedin', 'github']
+    return " • ".join(personal[field] for field in fields if personal.get(field))
+
+
+def _sections(data: Dict[str, Any]) -> List[Section]:
+    """Flatten prepared resume data into the section order used by the templates."""
+    sections: List[Section] = []
+    summary = data.get('personal_info', {}).get('summary')
+    if summary:
+        sections.append(("Professional Summary", [_entry("", body=summary)]))
+    if data.get('experience'):
+        sections.append(("Professional Experience", [
+            _entry(
+                exp.get('position', ''),
+                f"{exp.get('company', '')} • {exp.get('start_date', '')} - {exp.get('end_date', '')}",
+                exp.get('description', ''),
+                [f"Technologies: {exp['technologies']}"] if exp.get('technologies') else []
+            ) for exp in data['experience']
+        ]))
+    if data.get('education'):
+        sections.append(("Education", [
+            _entry(
+                edu.get('degree', ''),
+                " • ".join(part for part in [edu.get('institution', ''), edu.get('year', '')] if part),
+                details=[f"GPA: {edu['gpa']}"] if edu.get('gpa') else []
+            ) for edu in data['education']
+        ]))
+    if data.get('skills'):
+        sections.append(("Skills", [_entry("", body=", ".join(data['skills']))]))
+    if data.get('projects'):
+        sections.append(("Notable Projects", [
+            _entry(
+                project.get('name', ''),
+                body=project.get('description', ''),
+                details=([f"Technologies: {project['technologies']}"] if project.get('technologies') else [])
+                        + ([f"URL: {project['url']}"] if project.get('url') else [])
+            ) for project in data['projects']
+        ]))
+    if data.get('certifications'):
+        sections.append(("Certifications", [
+            _entry(
+                cert.get('name', ''),
+                f"{cert.get('issuer', '')} • {cert.get('date', '')}",
+                details=[f"Credential ID: {cert['credential_id']}"] if cert.get('credential_id') else []
+            ) for cert in data['certifications']
+        ]))
+    if data.get('languages'):
+        sections.append(("Languages", [
+            _entry("", body=", ".join(f"{lang.get('name', '')} ({lang.get('proficiency', '')})"
+                                      for lang in data['languages']))
+        ]))
+    return sections
+
+
+# ------------------- Markdown -------------------
+
+def export_markdown(data: Dict[str, Any]) -> str:
+    """Render resume data as Markdown."""
+    data = prepare_resume_data(data)
+    personal = data.get('personal_info', {})
+    lines = [f"# {personal.get('full_name', '')}", "", _contact_line(personal), ""]
+    for heading, entries in _sections(data):
+        lines += [f"## {heading}", ""]
+        for entry in entries:
+            if entry['title']:
+                lines.append(f"### {entry['title']}")
+            if entry['subtitle']:
+                lines.append(f"*{entry['subtitle']}*")
+            if entry['body']:
+                lines += ["", entry['body']] if entry['title'] or entry['subtitle'] else [entry['body']]
+            lines += [f"- {detail}" for detail in entry['details']]
+            lines.append("")
+    return "\n".join(lines).strip() + "\n"
+
+
+# ------------------- Plain Text -------------------
+
+def export_text(data: Dict[str, Any]) -> str:
+    """Render resume data as plain text, suitable for pasting into ATS forms."""
+    data = prepare_resume_data(data)
+    personal = data.get('personal_info', {})
+    lines = [personal.get('full_name', ''), _contact_line(personal), ""]
+    for heading, entries in _sections(data):
+        lines += [heading.upper(), "-" * len(heading)]
+        for entry in entries:
+            if entry['title']:
+                lines.append(entry['title'])
+            if entry['subtitle']:
+                lines.append(entry['subtitle'])
+            if entry['body']:
+                lines.append(entry['body'])
+            lines += entry['details']
+            lines.append("")
+    return "\n".join(lines).strip() + "\n"
+
+
+# ------------------- DOCX -------------------
+
+def export_docx(data: Dict[str, Any]) -> bytes:
+    """Render resume data as a Word document (requires python-docx)."""
+    try:
+        from docx import Document
+    except ImportError:
+        raise RuntimeError("DOCX export requires python-docx (pip install python-docx)")
+
+    data = prepare_resume_data(data)
+    personal = data.get('personal_info', {})
+    document = Document()
+    document.add_heading(personal.get('full_name', ''), level=0)
+    document.add_paragraph(_contact_line(personal))
+    for heading, entries in _sections(data):
+        document.add_heading(heading, level=1)
+        for entry in entries:
+            if entry['title']:
+                document.add_heading(entry['title'], level=2)
+            if entry['subtitle']:
+                document.add_paragraph().add_run(entry['subtitle']).italic = True
+            if entry['body']:
+                document.add_paragraph(entry['body'])
+            for detail in entry['details']:
+                document.add_paragraph(detail, style='List Bullet')
+
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+# Registered text exporters: name -> (render function, file extension, MIME type)
+EXPORTERS: Dict[str, Tuple[Callable[[Dict[str, Any]], Any], str, str]] = {
+    "markdown": (export_markdown, "md", "text/markdown"),
+    "text": (export_text, "txt", "text/plain"),
+    "docx": (export_docx, "docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+}
+
+
+def export_resume(format_name: str, data: Dict[str, Any]) -> Any:
+    """Render resume data in one of the registered text formats."""
+    if format_name not in EXPORTERS:
+        raise ValueError(f"Export format '{format_name}' not found")
+    return EXPORTERS[format_name][0](data)
+
+
+# ------------------- Benchmark -------------------
+
+if __name__ == "__main__":
+    import timeit
+    from sample_data import SAMPLE_RESUME_DATA
+
+    runs = 50
+    for name in EXPORTERS:
+        try:
+            seconds = timeit.timeit(lambda: export_resume(name, SAMPLE_RESUME_DATA), number=runs) / runs
+            print(f"🔹 {name:<8} {seconds * 1000:8.2f} ms")
+        except RuntimeError as e:
+            print(f"🔹 {name:<8} skipped ({str(e)})")
+
+    try:
+        from resume_generator import ResumeGenerator
+        from weasyprint import HTML
+    except (ImportError, OSError) as e:
+        print(f"🔹 pdf      skipped ({str(e).splitlines()[0]})")
+    else:
+        generator = ResumeGenerator()
+        html = generator.render_template("classic", SAMPLE_RESUME_DATA)
+        seconds = timeit.timeit(lambda: HTML(string=html).write_pdf(), number=5) / 5
+        print(f"🔹 pdf      {seconds * 1000:8.2f} ms")
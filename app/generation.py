@@ -0,0 +1,177 @@
+import os
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from regeneration import GENERATED_KEY, MODE_MISSING, profile_summary_key, needs_generation, mark_generated
+from speculative import (
+    job_description_key, project_description_key,
+    resolve_job_description, resolve_project_description
+)
+
+# Overall time the Generate buttons may spend on AI text, in seconds
+GENERATION_DEADLINE = float(os.getenv("GENERATION_DEADLINE", "30"))
+
+# Share of the deadline each kind of section gets relative to the others
+SECTION_WEIGHTS = {'profile_summary': 2, 'project_description': 1, 'job_description': 1}
+
+# Inputs key recorded for template text, so Update Changed replaces it later
+FALLBACK_INPUTS = 'fallback'
+
+
+class GenerationTask(NamedTuple):
+    kind: str
+    entry: Dict[str, Any]
+    field: str
+    inputs_key: str
+    generate: Callable[[float], str]   # takes an absolute time.monotonic() deadline
+    fallback: Callable[[], str]
+
+
+# ------------------- Template Fallbacks -------------------
+
+def _join(items: List[str]) -> str:
+    items = [item for item in items if item]
+    if len(items) < 2:
+        return ''.join(items)
+    return f"{', '.join(items[:-1])} and {items[-1]}"
+
+
+def fallback_profile_summary(resume_data: Dict[str, Any]) -> str:
+    experience = resume_data.get('experience', [])
+    role = experience[0].get('position', '') if experience else ''
+    skills = _join(resume_data.get('skills', [])[:3])
+    summary = f"{role or 'Professional'} with hands-on experience"
+    summary += f" in {skills}." if skills else "."
+    if experience and experience[0].get('company'):
+        summary += f" Most recently {role or 'working'} at {experience[0]['company']}."
+    return summary
+
+
+def fallback_project_description(project: Dict[str, Any]) -> str:
+    technologies = _join([t.strip() for t in project.get('technologies', '').split(',')])
+    description = f"Built {project.get('name', 'this project')}"
+    return description + (f" using {technologies}." if technologies else ".")
+
+
+def fallback_job_description(exp: Dict[str, Any]) -> str:
+    technologies = _join([t.strip() for t in exp.get('technologies', '').split(',')])
+    description = f"Worked as {exp.get('position', '')} at {exp.get('company', '')}"
+    return description + (f", using {technologies}." if technologies else ".")
+
+
+# ------------------- Planning and Execution -------------------
+
+def plan_generation(resume_data: Dict[str, Any], mode: str = MODE_MISSING) -> List[GenerationTask]:
+    """List the fields the given mode would (re)generate."""
+    from summarizer_agent import generate_profile_summary
+
+    tasks = []
+    personal_info = resume_data.get('personal_info')
+    if personal_info:
+        summary_key = profile_summary_key(resume_data)
+        if needs_generation(personal_info, 'summary', summary_key, mode):
+            tasks.append(GenerationTask(
+                'profile_summary', personal_info, 'summary', summary_key,
+                lambda deadline: generate_profile_summary(
+                    personal_info,
+                    resume_data.get('skills', []),
+                    resume_data.get('experience', []),
+                    resume_data.get('education', []),
+                    deadline=deadline
+                ),
+                lambda: fallback_profile_summary(resume_data)
+            ))
+
+    for project in resume_data.get('projects', []):
+        project_key = project_description_key(project)
+        if needs_generation(project, 'description', project_key, mode):
+            # Mostly a hit on the suggestion started when the project was added
+            tasks.append(GenerationTask(
+                'project_description', project, 'description', project_key,
+                lambda deadline, project=project: resolve_project_description(project, deadline),
+                lambda project=project: fallback_project_description(project)
+            ))
+
+    for exp in resume_data.get('experience', []):
+        exp_key = job_description_key(exp)
+        if needs_generation(exp, 'description', exp_key, mode):
+            # Mostly a hit on the suggestion started when the experience was added
+            tasks.append(GenerationTask(
+                'job_description', exp, 'description', exp_key,
+                lambda deadline, exp=exp: resolve_job_description(exp, deadline),
+                lambda exp=exp: fallback_job_description(exp)
+            ))
+    return tasks
+
+
+def generate_resume_text(resume_data: Dict[str, Any], mode: str = MODE_MISSING,
+                         deadline_seconds: Optional[float] = None,
+                         on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """Fill the resume's AI-written fields within an overall deadline.
+
+    Each section gets a weighted share of the time still left, so time a fast
+    section does not use rolls over to the next. A section that misses its
+    share keeps its existing text, or gets a plain template sentence if it
+    had none; so does a section whose every model call failed. on_progress,
+    if given, is called with (sections done, total) after each section.
+    Returns counts of generated, kept and fallback sections, how many of the
+    latter two were due to errors rather than time ('failed'), and the tokens
+    and cost spent on this resume.
+    """
+    from model_router import DeadlineExceeded, GenerationFailed
+    from token_budget import track_usage
+
+    deadline_seconds = GENERATION_DEADLINE if deadline_seconds is None else deadline_seconds
+    overall_deadline = time.monotonic() + deadline_seconds
+    tasks = plan_generation(resume_data, mode)
+    weight_left = sum(SECTION_WEIGHTS[task.kind] for task in tasks)
+    report = {'generated': 0, 'kept': 0, 'fallback': 0, 'failed': 0}
+
+    with track_usage() as usage:
+        for task in tasks:
+            now = time.monotonic()
+            share = (overall_deadline - now) * SECTION_WEIGHTS[task.kind] / weight_left
+            weight_left -= SECTION_WEIGHTS[task.kind]
+            try:
+                task.entry[task.field] = task.generate(now + max(share, 0))
+                mark_generated(task.entry, task.field, task.inputs_key)
+                report['generated'] += 1
+            except (DeadlineExceeded, GenerationFailed) as e:
+                print(f"Error generating {task.kind}: {str(e)}")
+                if isinstance(e, GenerationFailed):
+                    report['failed'] += 1
+                if (task.entry.get(task.field) or '').strip():
+                    report['kept'] += 1
+                else:
+                    task.entry[task.field] = task.fallback()
+                    mark_generated(task.entry, task.field, FALLBACK_INPUTS)
+                    report['fallback'] += 1
+            if on_progress:
+                on_progress(report['generated'] + report['kept'] + report['fallback'], len(tasks))
+    report.update(usage.summary())
+    return report
+
+
+def merge_generated_text(resume_data: Dict[str, Any], generated: Dict[str, Any]) -> int:
+    """Copy AI-written fields from a copy generated in the background into resume_data.
+
+    A field is copied only if its entry's inputs are still the ones the text
+    was generated from, so entries edited while the job ran are left alone.
+    Returns the number of fields copied.
+    """
+    pairs = [(resume_data.get('personal_info'), generated.get('personal_info'), 'summary',
+              lambda entry: profile_summary_key(resume_data), lambda entry: profile_summary_key(generated))]
+    for section, key in (('projects', project_description_key), ('experience', job_description_key)):
+        pairs += [(current, source, 'description', key, key)
+                  for current, source in zip(resume_data.get(section, []), generated.get(section, []))]
+
+    merged = 0
+    for current, source, field, current_key, source_key in pairs:
+        marker = (source or {}).get(GENERATED_KEY, {}).get(field)
+        if current is None or marker is None or current_key(current) != source_key(source):
+            continue
+        if current.get(field) != source.get(field):
+            current[field] = source.get(field)
+            current.setdefault(GENERATED_KEY, {})[field] = dict(marker)
+            merged += 1
+    return merged
@@ -1,27 +1,49 @@
 import streamlit as st
 import json
+import hashlib
 from datetime import datetime
-import re
 from typing import Optional, Dict, List, Any
 import os
+import copy
 from pathlib import Path
-from auth import auth, db  # Import Firebase auth and db
-from google.cloud.exceptions import NotFound
+from prefetch import start_prefetch, get_prefetch, invalidate_prefetch
+from token_manager import track_user, sync_user, release_user
+from validation import validate_section, validate_entry, errors_by_section
+from resume_state import tracker_for
+from sample_data import SAMPLE_RESUME_DATA
+from regeneration import MODE_MISSING, MODE_CHANGED, MODE_ALL
+from generation import merge_generated_text, plan_generation
+from speculative import (
+    speculate_job_description, speculate_project_description,
+    job_description_key, project_description_key, cancel as cancel_speculation
+)
+
+# --- Firebase Access ---
+# Firebase (firebase_admin, google-cloud, pyrebase) is imported on first use so
+# the landing page does not pay for it.
+def get_auth():
+    """Pyrebase auth client, imported on first use"""
+    from auth import auth
+    return auth
+
+def get_db():
+    """Firestore client, imported on first use"""
+    from auth import db
+    return db
 
 # --- Firestore Cloud Sync Helpers ---
-def save_user_data_firestore(user_id: str, data: dict):
-    """Save user data to Firestore."""
-    db.collection("users").document(user_id).set(data)
+def save_user_data_firestore(user_id: str, data: dict) -> str:
+    """Queue user data for Firestore; returns once it is durable in the local outbox."""
+    from outbox import enqueue_user_document
+    return enqueue_user_document(user_id, data)
 
 def fetch_user_data_firestore(user_id: str) -> dict:
-    """Fetch user data from Firestore."""
-    try:
-        doc = db.collection("users").document(user_id).get()
-        if doc.exists:
-            return doc.to_dict()
-    except Exception:
-        pass
-    return None
+    """Fetch user data through the read-through cache (memory, local snapshot, then Firestore)."""
+    from user_cache import load_user_document
+    return load_user_document(user_id, get_db, load_latest_user_data)
+
+# Seconds before the Profile page refreshes a finished prefetch
+PREFETCH_MAX_AGE = 60
 
 # Create data directory structure
 DATA_DIR = Path("data")
@@ -41,14 +63,20 @@ def get_user_data_path(user_id: str) -> Path:
 
 def save_user_data(user_id: str, data: Dict[str, Any]) -> str:
     """Save user data to their directory"""
+    from blob_store import json_bytes, digest_of, digest_for, store
     user_dir = get_user_data_path(user_id)
+    payload = json_bytes(data)
+
+    # Nothing changed since the last snapshot: keep it rather than writing another
+    latest = sorted(list_user_data(user_id))
+    if latest and digest_for(user_dir / latest[-1]) == digest_of(payload):
+        return str(user_dir / latest[-1])
+
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"resume_data_{timestamp}.json"
     filepath = user_dir / filename
-    
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    
+    store(filepath, payload)
+
     return str(filepath)
 
 def load_user_data(user_id: str, filename: str) -> Dict[str, Any]:
@@ -66,13 +94,20 @@ def list_user_data(user_id: str) -> List[str]:
 
 def save_backup(user_id: str, data: Dict[str, Any]) -> str:
     """Save a backup of user data"""
+    from blob_store import json_bytes, digest_of, digest_for, store
+    payload = json_bytes(data)
+
+    # Same content as the newest backup: nothing new to keep
+    latest = sorted(BACKUP_DIR.glob(f"backup_{user_id}_*.json"))
+    if latest and digest_for(latest[-1]) == digest_of(payload):
+        return str(latest[-1])
+
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"backup_{user_id}_{timestamp}.json"
     filepath = BACKUP_DIR / filename
-    
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    
+    # Shares its blob with the snapshot just saved, so a backup costs no extra space
+    store(filepath, payload)
+
     return str(filepath)
 
 def load_backup(filename: str) -> Dict[str, Any]:
@@ -83,21 +118,118 @@ def load_backup(filename: str) -> Dict[str, Any]:
 
 def save_profile_image(user_id: str, image_file, json_filename: str) -> str:
     """Save profile image to user's assets folder"""
+    from blob_store import store_in_directory
     user_dir = get_user_data_path(user_id)
     assets_dir = user_dir / "assets"
     assets_dir.mkdir(exist_ok=True)
 
-    # Get the base name of the JSON file without extension
-    base_name = Path(json_filename).stem
+    # Named after the JSON file; the same photo uploaded again reuses the file already saved
+    filename = f"{Path(json_filename).stem}{Path(image_file.name).suffix}"
+    return str(store_in_directory(assets_dir, filename, bytes(image_file.getbuffer())))
+
+def load_latest_user_data(user_id: str) -> Optional[Dict[str, Any]]:
+    """Load the newest local resume snapshot for a user, if any"""
+    files = sorted(list_user_data(user_id))
+    if not files:
+        return None
+    return load_user_data(user_id, files[-1])
+
+def load_profile_image_bytes(image_path: str) -> Optional[bytes]:
+    """Read a stored profile image, if it is still on disk"""
+    if not os.path.exists(image_path):
+        return None
+    with open(image_path, 'rb') as f:
+        return f.read()
+
+def submit_job(kind: str, payload: Dict[str, Any]) -> str:
+    """Queue a background job and remember its id in this session"""
+    import job_queue
+    user_id = st.session_state.user['localId'] if st.session_state.get('user') else None
+    job_id = job_queue.submit(kind, payload, user_id)
+    st.session_state.setdefault('jobs', {})[kind] = job_id
+    return job_id
+
+def job_resume_data() -> Dict[str, Any]:
+    """Resume data as sent to a job; an unsaved photo upload cannot be serialized"""
+    data = copy.deepcopy({k: v for k, v in st.session_state.resume_data.items() if k != 'personal_info'})
+    data['personal_info'] = {k: v for k, v in st.session_state.resume_data.get('personal_info', {}).items()
+                             if k != 'temp_profile_pic'}
+    return data
+
+def session_job(kind: str):
+    """This session's latest job of a kind, or the signed-in user's latest one from an
+    earlier session if it is still running or its result was never applied"""
+    import job_queue
+    job_id = st.session_state.get('jobs', {}).get(kind)
+    if job_id:
+        return job_queue.get_job(job_id)
+    if st.session_state.get('user'):
+        job = job_queue.latest_job(st.session_state.user['localId'], kind)
+        if job and (not job.finished or job.applied_at is None):
+            st.session_state.setdefault('jobs', {})[kind] = job.id
+            return job
+    return None
 
-    # Save the image with the same base name
-    image_path = assets_dir / f"{base_name}{Path(image_file.name).suffix}"
+def apply_finished_jobs():
+    """Take finished job results into this session, each exactly once.
 
-    # Save the image file
-    with open(image_path, "wb") as f:
-        f.write(image_file.getbuffer())
+    Generated text is merged into the resume and, for a signed-in user, saved
+    like Save Resume does, so a job that finished after the user left is not
+    lost. Waits until the user's background-loaded data has been applied, so
+    that load does not overwrite the merge.
+    """
+    import job_queue
+    from worker import export_pdfs
 
-    return str(image_path)
+    if st.session_state.user:
+        prefetch = get_prefetch(st.session_state.user['localId'])
+        if prefetch and st.session_state.get('prefetch_applied') != prefetch.started_at:
+            return
+    for kind in ("generate", "render", "export"):
+        job = session_job(kind)
+        if not job or not job.finished or job.applied_at is not None or not job_queue.mark_applied(job.id):
+            continue
+        if job.status == job_queue.FAILED:
+            st.session_state.job_notices[kind] = ('error', job.error)
+            continue
+        if kind == "export":
+            st.session_state.all_template_pdfs = export_pdfs(job.id)
+            if job.result.get('errors'):
+                st.session_state.job_notices[kind] = ('partial', job.result['errors'])
+            continue
+        st.session_state.generated_pdf_bytes = job_queue.result_bytes(job.id)
+        st.session_state.generated_pdf_filename = f"resume_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        st.session_state.job_notices[kind] = ('done', job.result.get('report'))
+        if kind == "generate":
+            # Copy the generated text into the resume, except entries edited meanwhile
+            merge_generated_text(st.session_state.resume_data, job.result['resume_data'])
+            if st.session_state.user:
+                user_id = st.session_state.user['localId']
+                try:
+                    save_user_data(user_id, st.session_state.resume_data)
+                    save_backup(user_id, st.session_state.resume_data)
+                    save_user_data_firestore(user_id, st.session_state.resume_data)
+                except Exception as e:
+                    print(f"Error saving generated resume text: {str(e)}")
+
+def prefetch_user_data(user_id: str):
+    """Load Firestore data, the latest snapshot and the profile image in the background"""
+    start_prefetch(user_id, fetch_user_data_firestore, load_latest_user_data, load_profile_image_bytes)
+    st.session_state.prefetch_applied = None
+
+def apply_prefetched_data(user_id: str) -> bool:
+    """Copy a finished background prefetch into this session (once per prefetch)"""
+    prefetch = get_prefetch(user_id)
+    if not prefetch or not prefetch.ready():
+        return False
+    if st.session_state.get('prefetch_applied') == prefetch.started_at:
+        return False
+    st.session_state.prefetch_applied = prefetch.started_at
+    if prefetch.resume_data:
+        st.session_state.resume_data = copy.deepcopy(prefetch.resume_data)
+    if prefetch.profile_image:
+        st.session_state.profile_image_bytes = (prefetch.profile_image_path, prefetch.profile_image)
+    return True
 
 # Page configuration (This should be the ONLY st.set_page_config call)
 st.set_page_config(
@@ -107,6 +239,44 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource
+def start_llm_warm_up():
+    """Warm the shared LLM client once per server process, off the request path"""
+    from llm_provider import warm_up_in_background
+    warm_up_in_background()
+    return True
+
+start_llm_warm_up()
+
+@st.cache_resource
+def start_outbox_worker():
+    """Drain queued Firestore saves in the background, once per server process"""
+    from outbox import start_worker, add_listener
+    from user_cache import record_remote_write
+    add_listener(record_remote_write)
+    start_worker(get_db)
+    return True
+
+start_outbox_worker()
+
+@st.cache_resource
+def start_job_workers():
+    """Run queued generate/render/export jobs in this process unless JOB_WORKERS=0"""
+    from worker import start_in_process_workers
+    start_in_process_workers()
+    return True
+
+start_job_workers()
+
+@st.cache_resource
+def start_thumbnail_precompute():
+    """Queue sample-data template thumbnails once per server process, off the request path"""
+    from thumbnails import precompute_in_background
+    precompute_in_background()
+    return True
+
+start_thumbnail_precompute()
+
 # Initialize session state for authentication and data
 if 'user' not in st.session_state:
     st.session_state.user = None
@@ -128,7 +298,9 @@ if 'resume_data' not in st.session_state:
 # Authentication functions
 def sign_up(email: str, password: str) -> bool:
     try:
+        auth = get_auth()
         user = auth.create_user_with_email_and_password(email, password)
+        track_user(auth, user)
         st.session_state.user = user
         return True
     except Exception as e:
@@ -137,23 +309,35 @@ def sign_up(email: str, password: str) -> bool:
 
 def sign_in(email: str, password: str) -> bool:
     try:
+        auth = get_auth()
         user = auth.sign_in_with_email_and_password(email, password)
+        track_user(auth, user)
         st.session_state.user = user
-        # Fetch Firestore data
-        user_id = user['localId']
-        firestore_data = fetch_user_data_firestore(user_id)
-        if firestore_data:
-            st.session_state.resume_data = firestore_data
+        # Load Firestore data in the background; the page picks it up when ready
+        prefetch_user_data(user['localId'])
         return True
     except Exception as e:
         st.error(f"Error signing in: {str(e)}")
         return False
 
 def sign_out():
+    if st.session_state.user:
+        invalidate_prefetch(st.session_state.user['localId'])
+        release_user(st.session_state.user['localId'])
+    st.session_state.profile_image_bytes = None
     st.session_state.user = None
     st.session_state.show_login = True
     st.rerun()
 
+# Keep the session's ID token fresh without another sign-in round trip
+if st.session_state.user:
+    try:
+        sync_user(get_auth(), st.session_state.user)
+    except Exception as e:
+        st.error(f"Your session has expired, please sign in again: {str(e)}")
+        st.session_state.user = None
+        st.session_state.show_login = True
+
 # Authentication UI
 if st.session_state.show_login and not st.session_state.user:
     st.markdown("""
@@ -197,6 +381,15 @@ if st.session_state.show_login and not st.session_state.user:
 
     st.stop()  # Stop execution here if not logged in
 
+# Pick up background-loaded user data as soon as it is available
+if st.session_state.user:
+    apply_prefetched_data(st.session_state.user['localId'])
+
+# Results of background jobs, including ones that finished after the user left
+if 'job_notices' not in st.session_state:
+    st.session_state.job_notices = {}
+apply_finished_jobs()
+
 # Sidebar navigation for main pages
 with st.sidebar:
     if st.session_state.user:
@@ -207,9 +400,11 @@ with st.sidebar:
         if st.button('👤 Profile'):
             st.session_state.main_page = 'profile'
             user_id = st.session_state.user['localId']
-            firestore_data = fetch_user_data_firestore(user_id)
-            if firestore_data:
-                st.session_state.resume_data = firestore_data
+            prefetch = get_prefetch(user_id)
+            # Reuse a pending or recent prefetch instead of fetching again
+            if prefetch is None or (prefetch.ready() and prefetch.age() > PREFETCH_MAX_AGE):
+                prefetch_user_data(user_id)
+            apply_prefetched_data(user_id)
 
         # Build Resume button
         if st.button('📝 Build Your Resume'):
@@ -340,7 +535,12 @@ if st.session_state.user:
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
             profile_pic = personal.get('profile_pic', None)
-            if profile_pic and os.path.exists(profile_pic):
+            cached_image = st.session_state.get('profile_image_bytes')
+            if profile_pic and cached_image and cached_image[0] == profile_pic:
+                st.markdown('<div class="profile-image-container">', unsafe_allow_html=True)
+                st.image(cached_image[1], width=160, use_column_width=False)
+                st.markdown('</div>', unsafe_allow_html=True)
+            elif profile_pic and os.path.exists(profile_pic):
                 st.markdown('<div class="profile-image-container">', unsafe_allow_html=True)
                 st.image(profile_pic, width=160, use_column_width=False)
                 st.markdown('</div>', unsafe_allow_html=True)
@@ -717,69 +917,14 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Helper functions for validation and data management
-def validate_date(date_str: str) -> bool:
-    """Validate date format (YYYY-MM or YYYY)"""
-    if date_str.lower() == 'present':
-        return True
-    pattern = r'^\d{4}(-\d{2})?$'
-    return bool(re.match(pattern, date_str))
-
-def validate_url(url: str) -> bool:
-    """Validate URL format"""
-    if not url:
-        return True
-    pattern = r'^https?:\/\/(www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b([-a-zA-Z0-9()@:%_\+.~#?&//=]*)$'
-    return bool(re.match(pattern, url))
-
-def validate_gpa(gpa: str) -> bool:
-    """Validate GPA format (0.0-4.0)"""
-    if not gpa:
-        return True
-    try:
-        gpa_float = float(gpa)
-        return 0.0 <= gpa_float <= 4.0
-    except ValueError:
-        return False
-
-def validate_required_fields(data: Dict[str, Any], required_fields: List[str]) -> List[str]:
-    """Validate required fields in a dictionary"""
-    errors = []
-    for field in required_fields:
-        if not data.get(field):
-            errors.append(f"{field.replace('_', ' ').title()} is required")
-    return errors
+# Helper functions for data management
+def get_resume_tracker():
+    """Derived resume state for this session; mutations of resume_data go through it"""
+    return tracker_for(st.session_state)
 
 def get_form_completion_percentage() -> float:
     """Calculate form completion percentage"""
-    total_fields = 0
-    completed_fields = 0
-
-    # Personal Info
-    personal_info = st.session_state.resume_data['personal_info']
-    required_personal = ['full_name', 'email', 'phone']
-    total_fields += len(required_personal)
-    completed_fields += sum(1 for field in required_personal if personal_info.get(field))
-
-    # Experience
-    experience = st.session_state.resume_data['experience']
-    if experience:
-        total_fields += 1
-        completed_fields += 1
-
-    # Education
-    education = st.session_state.resume_data['education']
-    if education:
-        total_fields += 1
-        completed_fields += 1
-
-    # Skills
-    skills = st.session_state.resume_data['skills']
-    if skills:
-        total_fields += 1
-        completed_fields += 1
-
-    return (completed_fields / total_fields) * 100 if total_fields > 0 else 0
+    return get_resume_tracker().completion_percentage()
 
 def auto_save_data():
     """Auto-save resume data to a temporary file"""
@@ -826,14 +971,6 @@ if 'current_step' not in st.session_state:
     st.session_state.current_step = 1
 
 # Helper functions
-def validate_email(email):
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
-
-def validate_phone(phone):
-    pattern = r'^[\+]?[1-9][\d]{0,15}$'
-    return re.match(pattern, phone.replace(' ', '').replace('-', '')) is not None
-
 def save_to_json():
     """Save resume data to JSON file"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -844,80 +981,9 @@ def save_to_json():
     
     return filename
 
-def save_profile_image(image_file, json_filename):
-    """Save profile image to assets folder with matching name"""
-    # Create assets directory if it's not exist
-    assets_dir = Path("assets")
-    assets_dir.mkdir(exist_ok=True)
-
-    # Get the base name of the JSON file without extension
-    base_name = Path(json_filename).stem
-
-    # Save the image with the same base name
-    image_path = assets_dir / f"{base_name}{Path(image_file.name).suffix}"
-
-    # Save the image file
-    with open(image_path, "wb") as f:
-        f.write(image_file.getbuffer())
-
-    return str(image_path)
-
 def load_sample_data():
     """Load sample data for demonstration"""
-    st.session_state.resume_data = {
-        'personal_info': {
-            'full_name': 'John Doe',
-            'email': 'john.doe@email.com',
-            'phone': '+1-555-0123',
-            'location': 'New York, NY',
-            'linkedin': 'linkedin.com/in/johndoe',
-            'github': 'github.com/johndoe',
-            'summary': 'Experienced software developer with 5+ years in full-stack development...'
-        },
-        'experience': [
-            {
-                'company': 'Tech Solutions Inc.',
-                'position': 'Senior Developer',
-                'start_date': '2022-01',
-                'end_date': 'Present',
-                'description': 'Led development of web applications using React and Python...'
-            }
-        ],
-        'education': [
-            {
-                'institution': 'University of Technology',
-                'degree': 'Bachelor of Computer Science',
-                'year': '2019',
-                'gpa': '3.8'
-            }
-        ],
-        'skills': ['Python', 'JavaScript', 'React', 'Node.js', 'SQL'],
-        'projects': [
-            {
-                'name': 'E-commerce Platform',
-                'description': 'Built a full-stack e-commerce platform...',
-                'technologies': 'React, Node.js, MongoDB'
-            }
-        ],
-        'certifications': [
-            {
-                'name': 'AWS Certified Developer',
-                'issuer': 'Amazon Web Services',
-                'date': '2023-01',
-                'credential_id': 'AWS-123456'
-            }
-        ],
-        'languages': [
-            {
-                'name': 'English',
-                'proficiency': 'Native'
-            },
-            {
-                'name': 'Spanish',
-                'proficiency': 'Intermediate'
-            }
-        ]
-    }
+    st.session_state.resume_data = copy.deepcopy(SAMPLE_RESUME_DATA)
 
 # Conditional rendering based on session state
 if st.session_state.show_home:
@@ -1364,43 +1430,24 @@ else:
                         st.success("Profile picture uploaded successfully!")
 
                 if st.button("💾 Save Personal Info", type="primary"):
-                    errors = []
-
-                    # Validate required fields
-                    required_fields = ['full_name', 'email', 'phone']
-                    field_values = {
+                    # Validate required fields and formats against the resume schema
+                    errors = validate_section('personal_info', {
                         'full_name': full_name,
                         'email': email,
-                        'phone': phone
-                    }
-                    errors.extend(validate_required_fields(field_values, required_fields))
-
-                    # Validate email format
-                    if email and not validate_email(email):
-                        errors.append("Please enter a valid email address")
+                        'phone': phone,
+                        'linkedin': linkedin,
+                        'github': github
+                    })
 
-                    # Validate phone format
-                    if phone and not validate_phone(phone):
-                        errors.append("Please enter a valid phone number")
-
-                    # Validate URLs
-                    if linkedin and not validate_url(linkedin):
-                        errors.append("Please enter a valid LinkedIn URL")
-                    if github and not validate_url(github):
-                        errors.append("Please enter a valid GitHub URL")
-                    
                     if errors:
                         for error in errors:
-                            st.error(error)
+                            st.error(error.message)
                     else:
-                        # If there's a profile picture, store it temporarily
-                        if hasattr(st.session_state, 'temp_profile_pic'):
-                            st.session_state.resume_data['personal_info']['temp_profile_pic'] = st.session_state.temp_profile_pic
-                            # Clear the temporary profile pic
-                            del st.session_state.resume_data['personal_info']['temp_profile_pic']
+                        # An uploaded photo stays in st.session_state.temp_profile_pic
+                        # until Save Resume stores it with the user's files
 
                         # Update personal info with all data
-                        st.session_state.resume_data['personal_info'].update({
+                        get_resume_tracker().update_personal_info({
                             'full_name': full_name,
                             'email': email,
                             'phone': phone,
@@ -1424,7 +1471,8 @@ else:
                     st.write(f"**Technologies:** {exp.get('technologies', 'N/A')}")
                     st.write(f"**Description:** {exp.get('description', 'Will be generated automatically')}")
                     if st.button(f"🗑️ Remove", key=f"remove_exp_{i}"):
-                        st.session_state.resume_data['experience'].pop(i)
+                        cancel_speculation(job_description_key(exp))
+                        get_resume_tracker().remove_item('experience', i)
                         st.rerun()
             
             # Add new experience
@@ -1444,20 +1492,25 @@ else:
                 st.info("Job description will be generated automatically using AI based on your role and technologies.")
                 
                 if st.button("➕ Add Experience", type="primary"):
-                    if company and position and start_date and technologies:
-                        new_exp = {
-                            'company': company,
-                            'position': position,
-                            'start_date': start_date,
-                            'end_date': end_date or 'Present',
-                            'technologies': technologies,
-                            'description': ""  # Will be generated
-                        }
-                        st.session_state.resume_data['experience'].append(new_exp)
+                    new_exp = {
+                        'company': company,
+                        'position': position,
+                        'start_date': start_date,
+                        'end_date': end_date or 'Present',
+                        'technologies': technologies,
+                        'description': ""  # Will be generated
+                    }
+                    # Required fields and date formats, checked against the resume schema
+                    errors = validate_entry('experience', new_exp)
+                    if errors:
+                        for error in errors:
+                            st.error(error.message)
+                    else:
+                        get_resume_tracker().add_item('experience', new_exp)
+                        # Start writing the job description while the user fills in the rest
+                        speculate_job_description(new_exp)
                         st.success("✅ Experience added successfully!")
                         st.rerun()
-                    else:
-                        st.error("Please fill in all required fields (*)")
 
         # Step 3: Education
         elif st.session_state.current_step == 3:
@@ -1470,7 +1523,7 @@ else:
                     if edu.get('gpa'):
                         st.write(f"**GPA:** {edu.get('gpa')}")
                     if st.button(f"🗑️ Remove", key=f"remove_edu_{i}"):
-                        st.session_state.resume_data['education'].pop(i)
+                        get_resume_tracker().remove_item('education', i)
                         st.rerun()
             
             # Add new education
@@ -1487,18 +1540,21 @@ else:
                     gpa = st.text_input("GPA (Optional)", placeholder="3.8/4.0", key="new_gpa")
                 
                 if st.button("➕ Add Education", type="primary"):
-                    if institution and degree and year:
-                        new_edu = {
-                            'institution': institution,
-                            'degree': degree,
-                            'year': year,
-                            'gpa': gpa
-                        }
-                        st.session_state.resume_data['education'].append(new_edu)
+                    new_edu = {
+                        'institution': institution,
+                        'degree': degree,
+                        'year': year,
+                        'gpa': gpa
+                    }
+                    # Required fields, year and GPA formats, checked against the resume schema
+                    errors = validate_entry('education', new_edu)
+                    if errors:
+                        for error in errors:
+                            st.error(error.message)
+                    else:
+                        get_resume_tracker().add_item('education', new_edu)
                         st.success("✅ Education added successfully!")
                         st.rerun()
-                    else:
-                        st.error("Please fill in all required fields (*)")
 
         # Step 4: Skills
         elif st.session_state.current_step == 4:
@@ -1515,7 +1571,7 @@ else:
                             st.markdown(f"🔹 {skill}")
                         with col2:
                             if st.button(f"🗑️ Remove", key=f"remove_skill_{i}"):
-                                st.session_state.resume_data['skills'].pop(i)
+                                get_resume_tracker().remove_item('skills', i)
                                 st.rerun()
                 
                 # Add new skill
@@ -1529,11 +1585,11 @@ else:
                 col_add, col_bulk = st.columns(2)
                 with col_add:
                     if st.button("➕ Add Skill", type="primary"):
-                        if new_skill and new_skill not in st.session_state.resume_data['skills']:
-                            st.session_state.resume_data['skills'].append(new_skill)
+                        if new_skill and not get_resume_tracker().has_skill(new_skill):
+                            get_resume_tracker().add_item('skills', new_skill)
                             st.success("✅ Skill added!")
                             st.rerun()
-                        elif new_skill in st.session_state.resume_data['skills']:
+                        elif new_skill and get_resume_tracker().has_skill(new_skill):
                             st.warning("Skill already exists!")
                 
                 with col_bulk:
@@ -1546,8 +1602,8 @@ else:
                         if bulk_skills:
                             skills_list = [skill.strip() for skill in bulk_skills.split(',') if skill.strip()]
                             for skill in skills_list:
-                                if skill not in st.session_state.resume_data['skills']:
-                                    st.session_state.resume_data['skills'].append(skill)
+                                if not get_resume_tracker().has_skill(skill):
+                                    get_resume_tracker().add_item('skills', skill)
                                 st.success(f"✅ Added {len(skills_list)} skills!")
                                 st.rerun()
 
@@ -1565,7 +1621,8 @@ else:
                     if project.get('url'):
                         st.write(f"**URL:** {project.get('url')}")
                     if st.button(f"🗑️ Remove", key=f"remove_project_{i}"):
-                        st.session_state.resume_data['projects'].pop(i)
+                        cancel_speculation(project_description_key(project))
+                        get_resume_tracker().remove_item('projects', i)
                         st.rerun()
             
             # Add new project
@@ -1593,7 +1650,9 @@ else:
                             'technologies': technologies,
                             'url': project_url
                         }
-                        st.session_state.resume_data['projects'].append(new_project)
+                        get_resume_tracker().add_item('projects', new_project)
+                        if not new_project['description']:
+                            speculate_project_description(new_project)
                         st.success("✅ Project added successfully!")
                         st.rerun()
                     else:
@@ -1611,7 +1670,7 @@ else:
                     if cert.get('credential_id'):
                         st.write(f"**Credential ID:** {cert.get('credential_id')}")
                     if st.button(f"🗑️ Remove", key=f"remove_cert_{i}"):
-                        st.session_state.resume_data['certifications'].pop(i)
+                        get_resume_tracker().remove_item('certifications', i)
                         st.rerun()
             
             # Add new certification
@@ -1635,7 +1694,7 @@ else:
                             'date': cert_date,
                             'credential_id': credential_id
                         }
-                        st.session_state.resume_data['certifications'].append(new_cert)
+                        get_resume_tracker().add_item('certifications', new_cert)
                         st.success("✅ Certification added successfully!")
                         st.rerun()
                     else:
@@ -1650,7 +1709,7 @@ else:
                 with st.expander(f"🌐 {lang.get('name', 'Language')}", expanded=False):
                     st.write(f"**Proficiency:** {lang.get('proficiency', 'N/A')}")
                     if st.button(f"🗑️ Remove", key=f"remove_lang_{i}"):
-                        st.session_state.resume_data['languages'].pop(i)
+                        get_resume_tracker().remove_item('languages', i)
                         st.rerun()
             
             # Add new language
@@ -1672,7 +1731,7 @@ else:
                             'name': lang_name,
                             'proficiency': proficiency
                         }
-                        st.session_state.resume_data['languages'].append(new_lang)
+                        get_resume_tracker().add_item('languages', new_lang)
                         st.success("✅ Language added successfully!")
                         st.rerun()
                     else:
@@ -1684,30 +1743,21 @@ else:
             
             with st.container():
                 # Data completeness check
-                completeness = []
-                if st.session_state.resume_data['personal_info'].get('full_name'):
-                    completeness.append("✅ Personal Information")
-                else:
-                    completeness.append("❌ Personal Information")
-                
-                if st.session_state.resume_data['experience']:
-                    completeness.append("✅ Work Experience")
-                else:
-                    completeness.append("⚠️ Work Experience (Optional)")
-                
-                if st.session_state.resume_data['education']:
-                    completeness.append("✅ Education")
-                else:
-                    completeness.append("⚠️ Education (Optional)")
-                
-                if st.session_state.resume_data['skills']:
-                    completeness.append("✅ Skills")
-                else:
-                    completeness.append("⚠️ Skills (Recommended)")
-                
+                tracker = get_resume_tracker()
+                completeness = tracker.checklist()
+
                 st.markdown("#### 📊 Resume Completeness:")
                 for item in completeness:
                     st.markdown(f"- {item}")
+
+                # Whole-resume validation, maintained incrementally as entries are edited
+                if tracker.error_count():
+                    st.markdown("#### ⚠️ Issues to Review:")
+                    for section, section_errors in errors_by_section(tracker.errors()).items():
+                        st.markdown(f"**{section.replace('_', ' ').title()}**")
+                        for error in section_errors:
+                            entry = f"#{error.index + 1}: " if error.index is not None else ""
+                            st.markdown(f"- {entry}{error.message}")
                 
                 st.markdown("---")
                 
@@ -1720,15 +1770,15 @@ else:
                             if st.session_state.user:
                                 user_id = st.session_state.user['localId']
                                 
-                                # Handle profile picture if exists
-                                if 'temp_profile_pic' in st.session_state.resume_data['personal_info']:
+                                # Handle profile picture if one was uploaded
+                                if st.session_state.get('temp_profile_pic') is not None:
                                     image_path = save_profile_image(
                                         user_id,
-                                        st.session_state.resume_data['personal_info']['temp_profile_pic'],
+                                        st.session_state.temp_profile_pic,
                                         f"resume_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
                                     )
-                                    st.session_state.resume_data['personal_info']['profile_pic'] = image_path
-                                    del st.session_state.resume_data['personal_info']['temp_profile_pic']
+                                    get_resume_tracker().update_personal_info({'profile_pic': image_path})
+                                    del st.session_state.temp_profile_pic
 
                                 # Save the resume data
                                 filepath = save_user_data(user_id, st.session_state.resume_data)
@@ -1736,7 +1786,7 @@ else:
                                 # Create a backup
                                 save_backup(user_id, st.session_state.resume_data)
 
-                                # Save to Firestore
+                                # Queue for Firestore; synced in the background with retries
                                 save_user_data_firestore(user_id, st.session_state.resume_data)
 
                                 st.markdown(f"""
@@ -1770,13 +1820,30 @@ else:
     # st.markdown('<h2 class="section-header">📄 Resume Generation</h2>', unsafe_allow_html=True)
 
     # Import the resume generator
-    from resume_generator import ResumeGenerator, show_resume_preview
+    from resume_generator import ResumeGenerator, show_resume_preview, PDF_PROFILES, DEFAULT_PDF_PROFILE
 
     # Initialize generator
     generator = ResumeGenerator()
 
     # Create a single column for template selection and controls
     st.markdown("#### 🎨 Choose Template for Resume Generation")
+
+    # Template gallery: first page of the user's resume in each template, shown
+    # from cache; the sample resume stands in until the user's thumbnail is ready
+    from thumbnails import request_thumbnail, get_thumbnail
+    gallery_data = (st.session_state.resume_data
+                    if st.session_state.resume_data.get('personal_info', {}).get('full_name') else SAMPLE_RESUME_DATA)
+    gallery_columns = st.columns(len(generator.templates))
+    for column, gallery_template in zip(gallery_columns, generator.templates):
+        with column:
+            thumbnail = (request_thumbnail(generator, gallery_template, gallery_data,
+                                           st.session_state.user['localId'] if st.session_state.user else None)
+                         or get_thumbnail(generator, gallery_template, SAMPLE_RESUME_DATA))
+            if thumbnail:
+                st.image(thumbnail, caption=gallery_template.capitalize(), use_column_width=True)
+            else:
+                st.caption(f"{gallery_template.capitalize()} preview is being prepared")
+
     # Template selection with preview cards
     template_name = st.radio(
         "Select a template style:",
@@ -1795,6 +1862,32 @@ else:
     st.markdown(f"**{template_name.capitalize()} Style**")
     st.markdown(f"_{template_descriptions[template_name]}_")
 
+    # Page-fit pre-flight: layout only, no PDF, cached per template and data
+    if st.session_state.resume_data.get('personal_info', {}).get('full_name'):
+        try:
+            layout = generator.estimate_layout(template_name, st.session_state.resume_data)
+            if layout.pages > 1:
+                overflowing = ", ".join(name.capitalize() for name in layout.overflowing)
+                st.warning(f"📏 This resume will be {layout.pages} pages in the {template_name.capitalize()} "
+                           f"template. Sections past page 1: {overflowing}")
+            else:
+                st.caption("📏 Fits on one page")
+        except Exception as e:
+            print(f"Error estimating layout: {str(e)}")
+
+    # PDF output profile (image quality vs. file size)
+    pdf_profile_descriptions = {
+        "standard": "Standard - original images, full fonts with hinting",
+        "optimized": "Optimized - subset fonts, 150 DPI images (recommended)",
+        "compact": "Compact - smallest file, 96 DPI images"
+    }
+    pdf_profile = st.selectbox(
+        "PDF quality",
+        options=list(PDF_PROFILES.keys()),
+        index=list(PDF_PROFILES.keys()).index(DEFAULT_PDF_PROFILE),
+        format_func=lambda x: pdf_profile_descriptions[x]
+    )
+
     # Create a container for the generate and download buttons
     button_container = st.container()
     with button_container:
@@ -1803,65 +1896,65 @@ else:
             generate_clicked = st.button("🔄 Generate Resume", type="primary", use_container_width=True)
         with col_regenerate:
             regenerate_clicked = st.button("🔄 Regenerate All", use_container_width=True)
+        with col_dl:
+            update_clicked = st.button("♻️ Update Changed", use_container_width=True,
+                                       help="Regenerate only AI text whose inputs changed; your edits are kept")
         # with col_dl:
         #     download_disabled = 'last_generated_resume' not in st.session_state
         #     download_clicked = st.button("📥 Download PDF", disabled=download_disabled, use_container_width=True)
 
-    if generate_clicked or regenerate_clicked:
-        with st.spinner("Generating your resume..."):
-            from summarizer_agent import generate_profile_summary, generate_project_description, generate_job_description
-
-            # Generate profile summary (regenerate if regenerate_clicked, otherwise only if empty)
-            if st.session_state.resume_data['personal_info']:
-                personal_info = st.session_state.resume_data['personal_info']
-                if regenerate_clicked or not personal_info.get('summary') or personal_info.get('summary', '').strip() == '':
-                    skills = st.session_state.resume_data.get('skills', [])
-                    experience = st.session_state.resume_data.get('experience', [])
-                    education = st.session_state.resume_data.get('education', [])
-                    personal_info['summary'] = generate_profile_summary(personal_info, skills, experience, education)
-
-            # Generate project descriptions (regenerate if regenerate_clicked, otherwise only if empty)
-            for project in st.session_state.resume_data['projects']:
-                if regenerate_clicked or not project.get('description') or project.get('description', '').strip() == '':
-                    project['description'] = generate_project_description(
-                        project['name'],
-                        project['technologies'].split(', ')
-                    )
-
-            # Generate job descriptions (regenerate if regenerate_clicked, otherwise only if empty)
-            for exp in st.session_state.resume_data['experience']:
-                if regenerate_clicked or not exp.get('description') or exp.get('description', '').strip() == '':
-                    exp['description'] = generate_job_description(
-                        exp['company'],
-                        exp['position'],
-                        exp['start_date'],
-                        exp['end_date'],
-                        exp.get('technologies', '')
-                    )
-
-            # Generate the resume preview
-            # show_resume_preview(generator, template_name, st.session_state.resume_data)
-
-            # Generate the PDF and store in session state
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            pdf_filename = f"resume_{timestamp}.pdf"
-            pdf_path = generator.generate_pdf(
-                generator.render_template(template_name, st.session_state.resume_data),
-                pdf_filename
-            )
-            if pdf_path:
-                pdf_bytes, download_filename = generator.get_pdf_download_link(pdf_path)
-                if pdf_bytes:
-                    st.session_state.generated_pdf_bytes = pdf_bytes
-                    st.session_state.generated_pdf_filename = download_filename
-                else:
-                    st.session_state.generated_pdf_bytes = None
-                    st.session_state.generated_pdf_filename = None
-            else:
-                st.session_state.generated_pdf_bytes = None
-                st.session_state.generated_pdf_filename = None
-
+    if generate_clicked or regenerate_clicked or update_clicked:
+        # Regenerate All rewrites everything, Update Changed refreshes AI text whose
+        # inputs changed, and Generate only fills empty fields
+        if regenerate_clicked:
+            generation_mode = MODE_ALL
+        elif update_clicked:
+            generation_mode = MODE_CHANGED
+        else:
+            generation_mode = MODE_MISSING
+
+        # AI text and the PDF are made by a background worker; the job outlives this page.
+        # With no AI text to write, a cheaper render job only lays out the PDF.
+        job_data = job_resume_data()
+        if plan_generation(job_data, generation_mode):
+            submit_job("generate", {
+                'resume_data': job_data,
+                'mode': generation_mode,
+                'template_name': template_name,
+                'profile': pdf_profile,
+            })
+        else:
+            submit_job("render", {'resume_data': job_data, 'template_name': template_name, 'profile': pdf_profile})
+
+    for pdf_kind in ("generate", "render"):
+        pdf_job = session_job(pdf_kind)
+        if pdf_job and not pdf_job.finished:
+            st.progress(pdf_job.progress, text=pdf_job.message or "Waiting for a worker...")
+        notice, detail = st.session_state.job_notices.pop(pdf_kind, (None, None))
+        if notice == 'error':
+            st.error(f"Error generating resume: {detail}")
+        elif notice == 'done' and not detail:
+            st.success("✅ Resume generated successfully! You can now download the PDF.")
+        elif notice == 'done':
+            generation_report = detail
+            failed = generation_report.get('failed', 0)
+            timed_out = generation_report['fallback'] + generation_report['kept'] - failed
+            if timed_out:
+                st.warning(f"⚠️ AI text took too long for {timed_out} "
+                           f"section(s); placeholder or existing text was used. Try \"♻️ Update Changed\" later.")
+            if failed:
+                st.warning(f"⚠️ The AI service returned errors for {failed} "
+                           f"section(s); placeholder or existing text was used. Try \"♻️ Update Changed\" later.")
             st.success("✅ Resume generated successfully! You can now download the PDF.")
+            if generation_report['calls'] or generation_report.get('abandoned'):
+                notes = []
+                if generation_report.get('shared'):
+                    notes.append(f"{generation_report['shared']} call(s) shared with identical requests")
+                if generation_report.get('abandoned'):
+                    notes.append(f"excludes {generation_report['abandoned']} call(s) still running at the deadline")
+                st.caption(f"AI usage: {generation_report['input_tokens']} input / "
+                           f"{generation_report['output_tokens']} output tokens (≈ ${generation_report['cost']:.4f})"
+                           + (f"; {', '.join(notes)}" if notes else ""))
 
     # Show download button if PDF is available
     if st.session_state.get('generated_pdf_bytes'):
@@ -1871,4 +1964,85 @@ else:
             file_name=st.session_state.generated_pdf_filename,
             mime="application/pdf",
             use_container_width=True
-        )
\ No newline at end of file
+        )
+
+    # Compare mode: every template rendered at once in worker processes
+    from resume_generator import zip_pdfs
+    if st.button("🗂️ Render All Templates", use_container_width=True,
+                 help="Create the PDF in every template at once to compare them"):
+        submit_job("export", {'resume_data': job_resume_data(), 'profile': pdf_profile})
+    export_job = session_job("export")
+    if export_job and not export_job.finished:
+        st.progress(export_job.progress, text=export_job.message or "Waiting for a worker...")
+    notice, detail = st.session_state.job_notices.pop("export", (None, None))
+    if notice == 'error':
+        st.error(f"Error rendering templates: {detail}")
+    elif notice == 'partial':
+        for failed_template, error in detail.items():
+            st.warning(f"⚠️ {failed_template.capitalize()} could not be rendered: {error}")
+    if st.session_state.get('all_template_pdfs'):
+        all_pdfs = st.session_state.all_template_pdfs
+        compare_columns = st.columns(len(all_pdfs) + 1)
+        for column, (compare_template, pdf_bytes) in zip(compare_columns, all_pdfs.items()):
+            with column:
+                st.download_button(
+                    label=f"📥 {compare_template.capitalize()}",
+                    data=pdf_bytes,
+                    file_name=f"resume_{compare_template}.pdf",
+                    mime="application/pdf",
+                    use_container_width=True
+                )
+        with compare_columns[-1]:
+            st.download_button(
+                label="📦 All (.zip)",
+                data=zip_pdfs(all_pdfs),
+                file_name="resume_all_templates.zip",
+                mime="application/zip",
+                use_container_width=True
+            )
+
+    # Lightweight text exports, rendered straight from the data without a PDF layout
+    from exporters import EXPORTERS, export_resume
+
+    st.markdown("#### 📄 Other Formats")
+    col_format, col_export = st.columns([2, 1])
+    with col_format:
+        export_format = st.selectbox(
+            "Export format",
+            options=list(EXPORTERS.keys()),
+            format_func=lambda x: {"markdown": "Markdown", "text": "Plain Text", "docx": "Word (DOCX)"}[x],
+            label_visibility="collapsed"
+        )
+    with col_export:
+        try:
+            _, extension, mime = EXPORTERS[export_format]
+            # Built again only when the format or the resume changes, not on every rerun
+            export_key = (export_format, hashlib.sha256(
+                json.dumps(st.session_state.resume_data, sort_keys=True, default=str).encode('utf-8')
+            ).hexdigest())
+            if st.session_state.get('exported_file', (None, None))[0] != export_key:
+                st.session_state.exported_file = (export_key, export_resume(export_format, st.session_state.resume_data))
+            st.download_button(
+                label=f"📥 Download .{extension}",
+                data=st.session_state.exported_file[1],
+                file_name=f"resume_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+                mime=mime,
+                use_container_width=True
+            )
+        except Exception as e:
+            st.error(f"Error exporting resume: {str(e)}")
+
+# Poll while this session's background jobs run, so progress and results appear
+if any(job and not job.finished for job in map(session_job, st.session_state.get('jobs', {}))):
+    import time
+    time.sleep(1)
+    st.rerun()
+
+# Rerun once background-loaded user data arrives so the page shows it
+if st.session_state.user:
+    pending = get_prefetch(st.session_state.user['localId'])
+    if pending and st.session_state.get('prefetch_applied') != pending.started_at:
+        if not pending.ready():
+            import time
+            time.sleep(0.5)
+        st.rerun()
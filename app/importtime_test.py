@@ -0,0 +1,149 @@
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Budget for the app's own modules on the landing page path, on top of
+# Streamlit itself (which every page pays regardless). Override with
+# LANDING_IMPORT_BUDGET_MS on slow CI machines.
+LANDING_IMPORT_BUDGET_MS = float(os.getenv("LANDING_IMPORT_BUDGET_MS", "250"))
+# Budget for the whole first run of home.py as a signed-out visitor sees it:
+# imports plus the once-per-process startup hooks (LLM warm-up, outbox and job
+# workers, thumbnail precompute), again on top of Streamlit's own first run
+LANDING_RUN_BUDGET_MS = float(os.getenv("LANDING_RUN_BUDGET_MS", "400"))
+
+# Heavy dependencies that must only load on the code paths that need them
+DEFERRED_MODULES = [
+    "weasyprint",
+    "langchain_groq",
+    "langchain_core",
+    "groq",
+    "firebase_admin",
+    "pyrebase",
+    "google.cloud",
+]
+
+# Threads the startup hooks start on purpose; they may load heavy modules
+BACKGROUND_THREADS = ("llm-warm-up", "firestore-outbox", "job-worker-")
+
+APP_DIR = Path(__file__).resolve().parent
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+# Runs home.py through Streamlit's AppTest harness, recording which thread
+# first imported each module, and prints the result as JSON
+LANDING_RUN_SCRIPT = """
+import json, sys, threading, time
+from streamlit.testing.v1 import AppTest
+
+class ImportRecorder:
+    def __init__(self):
+        self.threads = {}
+
+    def find_spec(self, name, path=None, target=None):
+        self.threads.setdefault(name, threading.current_thread().name)
+        return None
+
+AppTest.from_string("import streamlit as st").run()
+recorder = ImportRecorder()
+sys.meta_path.insert(0, recorder)
+start = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+elapsed = time.perf_counter() - start
+print("landing-run " + json.dumps({
+    'ms': elapsed * 1000,
+    'imports': recorder.threads.copy(),
+    'errors': [error.message for error in app.exception],
+}))
+"""
+
+
+def landing_imports(script: Path = APP_DIR / "home.py") -> List[str]:
+    """Modules imported unconditionally at the top level of the landing page."""
+    tree = ast.parse(script.read_text(encoding="utf-8"))
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return modules
+
+
+def measure_imports(modules: List[str]) -> Dict[str, int]:
+    """Run `python -X importtime` on the modules; return cumulative microseconds per module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {module}" for module in modules)],
+        cwd=APP_DIR, capture_output=True, text=True, check=True,
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    return cumulative
+
+
+def measure_landing_run(script: Path = APP_DIR / "home.py") -> Dict[str, Any]:
+    """Run the landing page once, startup hooks included, with the default environment.
+
+    Returns the run time in ms, the thread that first imported each module and
+    any exception the script raised. Runs from a scratch directory so the
+    workers' queue and data files stay out of the project.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        os.symlink(APP_DIR.parent / "templates", Path(workdir) / "templates")
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(APP_DIR), os.getenv("PYTHONPATH")])))
+        result = subprocess.run(
+            [sys.executable, "-c", LANDING_RUN_SCRIPT, str(script)],
+            cwd=workdir, env=env, capture_output=True, text=True, check=True,
+        )
+    # Background threads may print too; the result is the marked line
+    marked = next(line for line in result.stdout.splitlines() if line.startswith("landing-run "))
+    return json.loads(marked[len("landing-run "):])
+
+
+def check_landing_import_budget() -> List[str]:
+    """Return a list of budget violations for the landing page import path."""
+    modules = landing_imports()
+    timings = measure_imports(modules)
+    run = measure_landing_run()
+    problems = [f"home.py raised {error}" for error in run['errors']]
+
+    # Only the script thread counts: the warm-up thread loads LangChain and the
+    # job workers load WeasyPrint on purpose
+    for heavy in DEFERRED_MODULES:
+        loaded = [name for name, thread in run['imports'].items()
+                  if (name == heavy or name.startswith(heavy + "."))
+                  and not thread.startswith(BACKGROUND_THREADS)]
+        if loaded:
+            problems.append(f"{heavy} is imported on the landing page path")
+
+    local_modules = [module for module in modules if (APP_DIR / f"{module.split('.')[0]}.py").exists()]
+    total_ms = sum(timings.get(module, 0) for module in local_modules) / 1000
+    if total_ms > LANDING_IMPORT_BUDGET_MS:
+        problems.append(f"app modules took {total_ms:.1f} ms to import (budget {LANDING_IMPORT_BUDGET_MS:.0f} ms)")
+    if run['ms'] > LANDING_RUN_BUDGET_MS:
+        problems.append(f"first landing page run took {run['ms']:.1f} ms (budget {LANDING_RUN_BUDGET_MS:.0f} ms)")
+    return problems
+
+
+def test_landing_import_budget():
+    problems = check_landing_import_budget()
+    assert not problems, "; ".join(problems)
+
+
+if __name__ == "__main__":
+    modules = landing_imports()
+    timings = measure_imports(modules)
+    for module in modules:
+        print(f"🔹 {module:<20} {timings.get(module, 0) / 1000:8.1f} ms")
+    print(f"🔹 {'first run + hooks':<20} {measure_landing_run()['ms']:8.1f} ms")
+    problems = check_landing_import_budget()
+    for problem in problems:
+        print(f"❌ {problem}")
+    sys.exit(1 if problems else 0)
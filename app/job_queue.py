@@ -0,0 +1,367 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+
+JOBS_PATH = Path("data") / "jobs.sqlite3"
+# Output files (PDFs, zips) of finished jobs, named by job id
+RESULTS_DIR = Path("data") / "job_results"
+# A running job whose worker has not reported for this long is handed to another worker
+LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+# Runs of a job before it is marked failed (a job can crash its worker every time)
+MAX_ATTEMPTS = 3
+# Finished jobs and their output files are kept this long for the user to collect
+RESULT_RETENTION_SECONDS = float(os.getenv("JOB_RESULT_RETENTION_SECONDS", str(24 * 3600)))
+
+# Priority classes, most urgent first. A worker always takes work from the most
+# urgent class that has any, so a batch backlog never delays interactive jobs.
+PRIORITIES = ("preview", "pdf", "batch")
+# Class a job kind runs in unless the caller says otherwise
+KIND_PRIORITY = {'preview': "preview", 'generate': "pdf", 'render': "pdf", 'export': "pdf"}
+# Relative work per job kind, used to share each class fairly between users
+JOB_COSTS = {'preview': 1.0, 'render': 2.0, 'generate': 4.0, 'export': 6.0}
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+FINISHED = (DONE, FAILED)
+
+_local = threading.local()
+_wake = threading.Event()
+
+
+class Job(NamedTuple):
+    id: str
+    kind: str
+    user_id: Optional[str]
+    payload: Dict[str, Any]
+    status: str
+    progress: float
+    message: str
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    attempts: int
+    created_at: float
+    finished_at: Optional[float]
+    # When a session took the result into the user's resume (see mark_applied)
+    applied_at: Optional[float]
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+
+def _connect() -> sqlite3.Connection:
+    """Per-thread connection; the schema is created on first use."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        JOBS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(JOBS_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                user_id TEXT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                message TEXT NOT NULL DEFAULT '',
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                locked_until REAL NOT NULL DEFAULT 0,
+                worker TEXT,
+                priority INTEGER NOT NULL DEFAULT 1,
+                vstart REAL NOT NULL DEFAULT 0,
+                applied_at REAL
+            )
+        """)
+        # Queues created before priority classes existed
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if 'priority' not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 1")
+            conn.execute("ALTER TABLE jobs ADD COLUMN vstart REAL NOT NULL DEFAULT 0")
+            columns |= {'priority', 'vstart'}
+        if 'applied_at' not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN applied_at REAL")
+            # Results from before this column existed were shown in their session
+            conn.execute("UPDATE jobs SET applied_at = finished_at")
+        # Start-time fair queuing state: each class's virtual clock, and the
+        # virtual time at which each user's queued work in a class finishes
+        conn.execute("CREATE TABLE IF NOT EXISTS class_clock (priority INTEGER PRIMARY KEY, vtime REAL NOT NULL)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS fair_share (
+                priority INTEGER NOT NULL,
+                user_key TEXT NOT NULL,
+                last_finish REAL NOT NULL,
+                PRIMARY KEY (priority, user_key)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_schedule ON jobs (status, priority, vstart)")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_user ON jobs (user_id, kind, created_at)")
+        _local.conn = conn
+    return conn
+
+
+_COLUMNS = ("id, kind, user_id, payload, status, progress, message, result, error, attempts, "
+            "created_at, finished_at, applied_at")
+
+
+def _job(row: tuple) -> Job:
+    return Job(row[0], row[1], row[2], json.loads(row[3]), row[4], row[5], row[6],
+               json.loads(row[7]) if row[7] else None, row[8], row[9], row[10], row[11], row[12])
+
+
+def submit(kind: str, payload: Dict[str, Any], user_id: Optional[str] = None,
+           priority: Optional[str] = None, weight: float = 1.0) -> str:
+    """Queue a job and return its id; it survives restarts of the app and the workers.
+
+    priority is one of PRIORITIES (by default the kind's class). Within a
+    class, users share workers in proportion to weight: each job is tagged
+    with the virtual time at which it may start, which is the later of the
+    class clock and the end of the user's earlier jobs in the class, so a
+    user with a long backlog does not hold up one who just arrived.
+    """
+    priority = priority or KIND_PRIORITY.get(kind, "batch")
+    if priority not in PRIORITIES:
+        raise ValueError(f"Priority class '{priority}' not found")
+    rank = PRIORITIES.index(priority)
+    user_key = user_id or ''
+    job_id = uuid.uuid4().hex
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        clock = conn.execute("SELECT vtime FROM class_clock WHERE priority = ?", (rank,)).fetchone()
+        last = conn.execute(
+            "SELECT last_finish FROM fair_share WHERE priority = ? AND user_key = ?", (rank, user_key)
+        ).fetchone()
+        vstart = max(clock[0] if clock else 0.0, last[0] if last else 0.0)
+        conn.execute(
+            "INSERT OR REPLACE INTO fair_share (priority, user_key, last_finish) VALUES (?, ?, ?)",
+            (rank, user_key, vstart + JOB_COSTS.get(kind, 1.0) / weight)
+        )
+        conn.execute(
+            "INSERT INTO jobs (id, kind, user_id, payload, status, created_at, priority, vstart) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, user_id, json.dumps(payload, default=str), QUEUED, time.time(), rank, vstart)
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    _wake.set()
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[Job]:
+    row = _connect().execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _job(row) if row else None
+
+
+def latest_job(user_id: str, kind: str) -> Optional[Job]:
+    """The user's newest job of this kind, so a new session can pick up where the last one left."""
+    row = _connect().execute(
+        f"SELECT {_COLUMNS} FROM jobs WHERE user_id = ? AND kind = ? ORDER BY created_at DESC LIMIT 1",
+        (user_id, kind)
+    ).fetchone()
+    return _job(row) if row else None
+
+
+def mark_applied(job_id: str) -> bool:
+    """Record that a finished job's result was taken into the user's resume.
+
+    Returns False if another session already applied it, so each result is
+    applied exactly once even when the user has several tabs open.
+    """
+    return _connect().execute(
+        "UPDATE jobs SET applied_at = ? WHERE id = ? AND applied_at IS NULL AND status IN (?, ?)",
+        (time.time(), job_id, *FINISHED)
+    ).rowcount == 1
+
+
+def result_path(job_id: str) -> Path:
+    return RESULTS_DIR / job_id
+
+
+def result_bytes(job_id: str) -> Optional[bytes]:
+    """Output file of a finished job, or None if it had none or it has expired."""
+    path = result_path(job_id)
+    return path.read_bytes() if path.exists() else None
+
+
+def claim(worker: str, lowest: str = "batch") -> Optional[Job]:
+    """Lease the next runnable job to a worker.
+
+    Runnable means queued, or running under a lease that expired because its
+    worker died; such a job is started again from the beginning. A job that
+    has already used MAX_ATTEMPTS runs is marked failed instead. The job taken
+    is the one with the earliest virtual start time in the most urgent class.
+    Classes less urgent than `lowest` are left alone, so a worker can be kept
+    free for interactive work (jobs are not preempted once started).
+    """
+    now = time.time()
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+            "WHERE status = ? AND locked_until <= ? AND attempts >= ?",
+            (FAILED, "Job stopped its worker too many times", now, RUNNING, now, MAX_ATTEMPTS)
+        )
+        row = conn.execute(
+            f"SELECT {_COLUMNS}, priority, vstart FROM jobs "
+            "WHERE (status = ? OR (status = ? AND locked_until <= ?)) AND priority <= ? "
+            "ORDER BY priority, vstart, created_at LIMIT 1",
+            (QUEUED, RUNNING, now, PRIORITIES.index(lowest))
+        ).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, progress = 0, message = '', "
+                "started_at = ?, locked_until = ?, worker = ? WHERE id = ?",
+                (RUNNING, now, now + LEASE_SECONDS, worker, row[0])
+            )
+            # The class clock advances to the start tag of the job now in service
+            conn.execute(
+                "INSERT INTO class_clock (priority, vtime) VALUES (?, ?) "
+                "ON CONFLICT (priority) DO UPDATE SET vtime = MAX(vtime, excluded.vtime)",
+                (row[-2], row[-1])
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return _job(row[:-2])._replace(status=RUNNING, attempts=row[9] + 1) if row else None
+
+
+def report_progress(job_id: str, progress: float, message: str = ""):
+    """Record progress (0-1) and renew the lease of a running job."""
+    _connect().execute(
+        "UPDATE jobs SET progress = ?, message = ?, locked_until = ? WHERE id = ? AND status = ?",
+        (min(max(progress, 0.0), 1.0), message, time.time() + LEASE_SECONDS, job_id, RUNNING)
+    )
+
+
+def complete(job_id: str, result: Optional[Dict[str, Any]] = None, output: Optional[bytes] = None):
+    """Mark a job done, storing its result and optional output file."""
+    if output is not None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = result_path(job_id)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(output)
+        os.replace(tmp, path)
+    _connect().execute(
+        "UPDATE jobs SET status = ?, progress = 1, message = '', result = ?, finished_at = ?, locked_until = 0 "
+        "WHERE id = ? AND status = ?",
+        (DONE, json.dumps(result or {}, default=str), time.time(), job_id, RUNNING)
+    )
+
+
+def fail(job_id: str, error: str):
+    _connect().execute(
+        "UPDATE jobs SET status = ?, error = ?, finished_at = ?, locked_until = 0 WHERE id = ? AND status = ?",
+        (FAILED, error, time.time(), job_id, RUNNING)
+    )
+
+
+def purge_expired() -> int:
+    """Delete finished jobs older than the retention period, with their output files."""
+    cutoff = time.time() - RESULT_RETENTION_SECONDS
+    conn = _connect()
+    ids = [row[0] for row in conn.execute(
+        "SELECT id FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (*FINISHED, cutoff)
+    )]
+    for job_id in ids:
+        result_path(job_id).unlink(missing_ok=True)
+        conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+    # Users whose work ends before the class clock start at the clock anyway
+    conn.execute(
+        "DELETE FROM fair_share WHERE last_finish <= "
+        "(SELECT vtime FROM class_clock WHERE class_clock.priority = fair_share.priority)"
+    )
+    return len(ids)
+
+
+def wait_for_work(timeout: float):
+    """Sleep until a job is submitted in this process or the timeout passes."""
+    _wake.wait(timeout)
+    _wake.clear()
+
+
+def queue_metrics() -> Dict[str, Any]:
+    """Jobs in each status, plus per priority class the queue depth, the users
+    waiting and how long the oldest queued job has waited (in seconds)."""
+    conn = _connect()
+    counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+    metrics: Dict[str, Any] = {status: counts.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)}
+    now = time.time()
+    by_class = {rank: row for rank, *row in conn.execute(
+        "SELECT priority, COUNT(*), COUNT(DISTINCT COALESCE(user_id, '')), MIN(created_at) "
+        "FROM jobs WHERE status = ? GROUP BY priority", (QUEUED,)
+    )}
+    for rank, name in enumerate(PRIORITIES):
+        depth, users, oldest = by_class.get(rank, (0, 0, None))
+        metrics[name] = {
+            'depth': depth,
+            'users': users,
+            'oldest_wait': round(now - oldest, 1) if oldest else 0.0,
+        }
+    return metrics
+
+
+if __name__ == "__main__":
+    # Simulated pair of workers: interactive users keep arriving while a batch
+    # re-export backlog of growing size waits in the same queue
+    import heapq
+    import random
+    import tempfile
+
+    def simulate(backlog: int, use_priorities: bool = True, reserve_worker: bool = False) -> Dict[str, float]:
+        global JOBS_PATH
+        JOBS_PATH = Path(tempfile.mkdtemp()) / "jobs.sqlite3"
+        _local.conn = None
+        service = {'preview': 0.5, 'render': 1.5, 'generate': 6.0, 'export': 4.0}
+        randomizer = random.Random(7)
+        submitted_at = {}
+        for i in range(backlog):
+            job_id = submit("export", {}, f"batch-{i % 3}", "batch" if use_priorities else "pdf")
+            submitted_at[job_id] = (0.0, "batch")
+        # (time the worker is free, worker number); worker 0 may be kept for interactive work
+        workers = [(0.0, 0), (0.0, 1)]
+        waits = []
+        next_arrival = 0.0
+        while len(waits) < 300:
+            clock, worker = heapq.heappop(workers)
+            while next_arrival <= clock:
+                kind = randomizer.choice(["preview", "preview", "render", "generate"])
+                job_id = submit(kind, {}, f"user-{randomizer.randrange(20)}")
+                submitted_at[job_id] = (next_arrival, "interactive")
+                next_arrival += randomizer.expovariate(1 / 2.0)
+            job = claim(f"simulated-{worker}", "pdf" if reserve_worker and worker == 0 else "batch")
+            if job is None:
+                heapq.heappush(workers, (next_arrival, worker))
+                continue
+            arrived, origin = submitted_at[job.id]
+            if origin == "interactive":
+                waits.append(clock - arrived)
+            complete(job.id)
+            heapq.heappush(workers, (clock + service[job.kind], worker))
+        waits.sort()
+        return {'p50': waits[len(waits) // 2], 'p95': waits[int(0.95 * (len(waits) - 1))]}
+
+    print("🔹 interactive wait p50 / p95 in seconds, two workers")
+    for backlog in (0, 100, 1000):
+        results = [simulate(backlog, False), simulate(backlog), simulate(backlog, reserve_worker=True)]
+        print(f"🔹 batch backlog {backlog:>4}: " + "   ".join(
+            f"{label} {r['p50']:5.1f} / {r['p95']:5.1f}"
+            for label, r in zip(("one class", "classes", "classes + reserved worker"), results)
+        ))
@@ -0,0 +1,202 @@
+import os
+import json
+import math
+import time
+import random
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# live: call Groq. record: call Groq and append every prompt/response pair to
+# the fixture file. replay: answer from the fixture file without a network or key.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "live")
+LLM_FIXTURES = Path(os.getenv("LLM_FIXTURES", "data/llm_fixtures.jsonl"))
+
+# Replay tuning: median latency and log-normal spread (sigma 0 = constant), the
+# share of calls that fail, and the random seed that makes a run repeatable
+REPLAY_LATENCY_MS = float(os.getenv("LLM_REPLAY_LATENCY_MS", "0"))
+REPLAY_LATENCY_SIGMA = float(os.getenv("LLM_REPLAY_LATENCY_SIGMA", "0.5"))
+REPLAY_ERROR_RATE = float(os.getenv("LLM_REPLAY_ERROR_RATE", "0"))
+REPLAY_SEED = int(os.getenv("LLM_REPLAY_SEED", "42"))
+# With strict replay an unrecorded prompt is an error; otherwise it is served a
+# recorded response for the same model (user data varies between load-test runs)
+REPLAY_STRICT = os.getenv("LLM_REPLAY_STRICT", "0") == "1"
+
+
+class ReplayError(Exception):
+    """A replayed call failed (synthetic error or no matching fixture)."""
+
+
+class FixtureResponse:
+    """Recorded response with the attributes callers read from a LangChain message."""
+
+    def __init__(self, content: str, usage_metadata: Optional[Dict[str, int]] = None):
+        self.content = content
+        self.usage_metadata = usage_metadata
+
+
+def fixture_key(model_name: str, options: Dict[str, Any], prompt: str) -> str:
+    payload = json.dumps([model_name, sorted(options.items()), prompt], default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LiveBackend:
+    def invoke(self, prompt: str, model_name: str, options: Dict[str, Any]) -> Any:
+        from llm_provider import get_llm
+        return get_llm(model_name).bind(**options).invoke(prompt)
+
+
+class RecordBackend(LiveBackend):
+    """Live calls, each appended to the fixture file as one JSON line."""
+
+    def __init__(self, path: Path = LLM_FIXTURES):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt: str, model_name: str, options: Dict[str, Any]) -> Any:
+        response = super().invoke(prompt, model_name, options)
+        record = {
+            'key': fixture_key(model_name, options, prompt),
+            'model': model_name,
+            'options': options,
+            'prompt': prompt,
+            'content': response.content,
+            'usage_metadata': dict(getattr(response, 'usage_metadata', None) or {}),
+        }
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+        return response
+
+
+class ReplayBackend:
+    """Serve recorded responses with synthetic latency and errors."""
+
+    def __init__(self, path: Path = LLM_FIXTURES, latency_ms: float = REPLAY_LATENCY_MS,
+                 latency_sigma: float = REPLAY_LATENCY_SIGMA, error_rate: float = REPLAY_ERROR_RATE,
+                 seed: int = REPLAY_SEED, strict: bool = REPLAY_STRICT):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.strict = strict
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, Dict[str, Any]] = {}
+        self._by_model: Dict[str, List[Dict[str, Any]]] = {}
+        if not path.exists():
+            raise ReplayError(f"Fixture file '{path}' not found; record one with LLM_BACKEND=record")
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._by_key[record['key']] = record
+                    self._by_model.setdefault(record['model'], []).append(record)
+
+    def _sample(self):
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+            latency = self.latency_ms * math.exp(self._random.gauss(0, self.latency_sigma)) if self.latency_ms else 0
+        return failed, latency / 1000
+
+    def _lookup(self, prompt: str, model_name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        record = self._by_key.get(fixture_key(model_name, options, prompt))
+        if record is not None:
+            return record
+        candidates = self._by_model.get(model_name) or [r for records in self._by_model.values() for r in records]
+        if self.strict or not candidates:
+            raise ReplayError(f"No recorded response for this {model_name} prompt")
+        # Same prompt always gets the same stand-in
+        index = int(hashlib.sha256(prompt.encode('utf-8')).hexdigest(), 16) % len(candidates)
+        return candidates[index]
+
+    def invoke(self, prompt: str, model_name: str, options: Dict[str, Any]) -> FixtureResponse:
+        record = self._lookup(prompt, model_name, options)
+        failed, latency = self._sample()
+        timeout = options.get('timeout')
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Replayed {model_name} call timed out after {timeout}s")
+        time.sleep(latency)
+        if failed:
+            raise ReplayError(f"Synthetic {model_name} error")
+        return FixtureResponse(record['content'], record.get('usage_metadata') or None)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Backend selected by LLM_BACKEND, created once per process."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if LLM_BACKEND == "live":
+                _backend = LiveBackend()
+            elif LLM_BACKEND == "record":
+                _backend = RecordBackend()
+            elif LLM_BACKEND == "replay":
+                _backend = ReplayBackend()
+            else:
+                raise ValueError(f"LLM backend '{LLM_BACKEND}' not found")
+        return _backend
+
+
+def set_backend(backend):
+    """Swap the backend (e.g. a ReplayBackend with other latency settings in a benchmark)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+if __name__ == "__main__":
+    # Benchmark the Generate flow offline:
+    #   LLM_BACKEND=record streamlit run home.py        # capture fixtures once
+    #   python llm_backends.py [users] [--synthetic]    # replay them concurrently
+    import sys
+    import copy
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+    from sample_data import SAMPLE_RESUME_DATA
+    from generation import generate_resume_text
+    from model_router import MODEL_TIERS, routing_metrics
+    # The app imports this file as llm_backends, not __main__
+    import llm_backends
+
+    users = int(next((arg for arg in sys.argv[1:] if arg.isdigit()), "20"))
+    fixtures = LLM_FIXTURES
+    if "--synthetic" in sys.argv:
+        # Canned answers per model, for machines that have never recorded
+        fixtures = Path(tempfile.mkdtemp()) / "llm_fixtures.jsonl"
+        with open(fixtures, 'w', encoding='utf-8') as f:
+            for tier in MODEL_TIERS.values():
+                f.write(json.dumps({
+                    'key': '', 'model': tier['model'], 'options': {}, 'prompt': '',
+                    'content': "Built and shipped data pipelines in Python and SQL that cut reporting "
+                               "time by 40 percent, and led the migration of three services to Kubernetes.",
+                    'usage_metadata': {'input_tokens': 420, 'output_tokens': 40},
+                }) + '\n')
+
+    llm_backends.set_backend(llm_backends.ReplayBackend(fixtures, latency_ms=REPLAY_LATENCY_MS or 400))
+
+    def one_user(user: int) -> float:
+        # Distinct users, so prompts are not coalesced into one call
+        data = copy.deepcopy(SAMPLE_RESUME_DATA)
+        data['personal_info']['full_name'] += f" {user}"
+        data['personal_info']['summary'] = ''
+        for section, field in (('projects', 'name'), ('experience', 'company')):
+            for entry in data[section]:
+                entry[field] += f" {user}"
+                entry['description'] = ''
+        start = time.perf_counter()
+        generate_resume_text(data)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        durations = sorted(pool.map(one_user, range(users)))
+    print(f"🔹 {users} concurrent resumes in {time.perf_counter() - start:.2f} s")
+    print(f"🔹 p50 {durations[len(durations) // 2]:.2f} s, p95 {durations[int(0.95 * (len(durations) - 1))]:.2f} s")
+    print(f"🔹 {routing_metrics()}")
@@ -0,0 +1,195 @@
+import os
+import sys
+import time
+import threading
+from typing import Any, Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables from .env
+load_dotenv()
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+GROQ_API_BASE = os.getenv("GROQ_API_BASE", "https://api.groq.com")
+
+# Connection pool limits shared by every session and thread in the process
+POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "20"))
+POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "10"))
+POOL_KEEPALIVE_EXPIRY = float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "120"))
+REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "30"))
+# Set LLM_WARM_UP=0 to skip the start-up warm-up (e.g. for import-time profiling)
+WARM_UP_ENABLED = os.getenv("LLM_WARM_UP", "1") != "0"
+
+_lock = threading.Lock()
+_http_client = None
+_clients: Dict[str, object] = {}
+_warm_up_thread: Optional[threading.Thread] = None
+
+
+def get_http_client():
+    """Return the process-wide keep-alive HTTP client used for all LLM calls."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            import httpx
+
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+                ),
+                timeout=REQUEST_TIMEOUT,
+            )
+        return _http_client
+
+
+def get_llm(model_name: str = DEFAULT_MODEL):
+    """Return a shared ChatGroq client for the model, built on the pooled HTTP client."""
+    client = _clients.get(model_name)
+    if client is not None:
+        return client
+
+    from langchain_groq import ChatGroq
+
+    http_client = get_http_client()
+    with _lock:
+        if model_name not in _clients:
+            _clients[model_name] = ChatGroq(
+                api_key=os.getenv("GROQ_API_KEY"),
+                model_name=model_name,
+                groq_api_base=GROQ_API_BASE,
+                http_client=http_client,
+                request_timeout=REQUEST_TIMEOUT,
+            )
+        return _clients[model_name]
+
+
+def _call(prompt: str, model_name: str, options: Dict) -> Tuple[str, Dict[str, Any]]:
+    from llm_backends import get_backend
+    from token_budget import record_call
+
+    response = get_backend().invoke(prompt, model_name, options)
+    return response.content.strip(), record_call(model_name, prompt, response)
+
+
+def invoke(prompt: str, model_name: str = DEFAULT_MODEL, **options) -> str:
+    """Call the model and return its text.
+
+    Identical concurrent requests (same model, options and prompt) share one
+    in-flight call. Its tokens count once in the per-model totals, and are
+    charged to every caller's usage context, marked as shared for all but the
+    caller that made it. `options` (e.g. max_tokens, timeout) go to the Groq API.
+    """
+    from singleflight import llm_flight, flight_key
+    from token_budget import add_shared
+
+    made_call = []
+
+    def call():
+        made_call.append(True)
+        return _call(prompt, model_name, options)
+
+    text, record = llm_flight.do(flight_key(model_name, repr(sorted(options.items())), prompt), call)
+    if not made_call:
+        add_shared(record)
+    return text
+
+
+def warm_up(model_name: str = DEFAULT_MODEL) -> float:
+    """Import the LLM stack, build the client and open a pooled connection.
+
+    Returns the seconds it took. Connection errors are reported but not raised,
+    so a warm-up never blocks the app from starting.
+    """
+    start = time.perf_counter()
+    from llm_backends import LLM_BACKEND
+    if LLM_BACKEND == "replay":
+        # Answers come from fixtures; there is no client or connection to warm
+        return 0.0
+    get_llm(model_name)
+    try:
+        # Cheap authenticated request that completes the TLS handshake and leaves
+        # a keep-alive connection in the pool for the first real generation.
+        get_http_client().get(
+            f"{GROQ_API_BASE}/openai/v1/models",
+            headers={"Authorization": f"Bearer {os.getenv('GROQ_API_KEY', '')}"},
+        )
+    except Exception as e:
+        print(f"LLM warm-up request failed: {str(e)}")
+    return time.perf_counter() - start
+
+
+def warm_up_in_background(model_name: str = DEFAULT_MODEL):
+    """Start warm-up once per process on a daemon thread."""
+    global _warm_up_thread
+    with _lock:
+        if _warm_up_thread is not None or not WARM_UP_ENABLED:
+            return
+        _warm_up_thread = threading.Thread(target=warm_up, args=(model_name,), name="llm-warm-up", daemon=True)
+    _warm_up_thread.start()
+
+
+# ------------------- Latency Measurement -------------------
+
+if __name__ == "__main__":
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class StubGroqHandler(BaseHTTPRequestHandler):
+        """Minimal OpenAI-compatible endpoint that answers instantly, with keep-alive."""
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _reply(self, payload: dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._reply({"object": "list", "data": []})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self._reply({
+                "id": "stub", "object": "chat.completion", "created": 0, "model": DEFAULT_MODEL,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "Stub response."}}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13},
+            })
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGroqHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    GROQ_API_BASE = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.setdefault("GROQ_API_KEY", "stub")
+
+    def timed_call(llm) -> float:
+        start = time.perf_counter()
+        llm.invoke("Say hello")
+        return time.perf_counter() - start
+
+    if "--cold" in sys.argv:
+        start = time.perf_counter()
+        timed_call(get_llm())
+        print(f"🔹 First call without warm-up (import + client + connect): {(time.perf_counter() - start) * 1000:.1f} ms")
+    else:
+        print(f"🔹 Warm-up (import + client + connect): {warm_up() * 1000:.1f} ms")
+        print(f"🔹 First call after warm-up: {timed_call(get_llm()) * 1000:.2f} ms")
+
+    steady = sorted(timed_call(get_llm()) for _ in range(50))
+    print(f"🔹 Steady state, pooled:  p50 {steady[25] * 1000:.2f} ms  p95 {steady[47] * 1000:.2f} ms")
+
+    from langchain_groq import ChatGroq
+
+    def unpooled_call() -> float:
+        llm = ChatGroq(api_key="stub", model_name=DEFAULT_MODEL, groq_api_base=GROQ_API_BASE)
+        return timed_call(llm)
+
+    unpooled = sorted(unpooled_call() for _ in range(50))
+    print(f"🔹 Fresh client per call: p50 {unpooled[25] * 1000:.2f} ms  p95 {unpooled[47] * 1000:.2f} ms")
+    server.shutdown()
@@ -0,0 +1,235 @@
+import os
+import time
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from llm_provider import invoke
+
+# Model tiers. Each has a latency budget (the request timeout) and an output
+# token budget; the models can be swapped per deployment via environment variables.
+MODEL_TIERS: Dict[str, Dict[str, Any]] = {
+    "fast": {
+        "model": os.getenv("GROQ_FAST_MODEL", "llama-3.1-8b-instant"),
+        "latency_budget": float(os.getenv("GROQ_FAST_LATENCY_BUDGET", "8")),
+        "max_tokens": 160,
+    },
+    "quality": {
+        "model": os.getenv("GROQ_QUALITY_MODEL", "llama-3.3-70b-versatile"),
+        "latency_budget": float(os.getenv("GROQ_QUALITY_LATENCY_BUDGET", "20")),
+        "max_tokens": 240,
+    },
+}
+
+# Tier used when the routed tier fails or its output does not validate
+FALLBACK_TIER = "quality"
+
+# Tier that receives the hedged duplicate when a call on the other is slow
+HEDGE_TIERS = {"fast": "quality", "quality": "fast"}
+# A call is hedged once it runs longer than this percentile of its tier's recent latency
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+# Until a tier has this many samples, hedge after half its latency budget
+HEDGE_MIN_SAMPLES = 20
+
+# Which tier serves each generation task, and the word range its output must fall in
+TASK_ROUTES: Dict[str, Dict[str, Any]] = {
+    "profile_summary": {"tier": os.getenv("PROFILE_SUMMARY_TIER", "quality"), "min_words": 20, "max_words": 90},
+    "project_description": {"tier": os.getenv("PROJECT_DESCRIPTION_TIER", "fast"), "min_words": 15, "max_words": 90},
+    "job_description": {"tier": os.getenv("JOB_DESCRIPTION_TIER", "fast"), "min_words": 15, "max_words": 90},
+}
+
+# Phrases that mean the model answered about the task instead of doing it
+REFUSAL_MARKERS = ("as an ai", "i cannot", "i can't", "i'm sorry", "here is a", "here's a")
+
+
+class LatencyStats:
+    """Rolling latency samples and outcome counters for one tier."""
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.over_budget = 0
+
+    def record(self, seconds: float, budget: float, outcome: str = "ok"):
+        with self._lock:
+            self.calls += 1
+            self._samples.append(seconds)
+            if seconds > budget:
+                self.over_budget += 1
+            if outcome == "error":
+                self.failures += 1
+            elif outcome == "rejected":
+                self.rejected += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "over_budget": self.over_budget,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+        }
+
+
+tier_stats: Dict[str, LatencyStats] = {tier: LatencyStats() for tier in MODEL_TIERS}
+hedge_stats = {'hedged': 0, 'hedge_wins': 0, 'deadline_misses': 0, 'all_failed': 0}
+_hedge_lock = threading.Lock()
+
+# Calls run here while the caller waits; size for concurrent sessions x hedges
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_ROUTER_WORKERS", "32")), thread_name_prefix="model-router")
+
+
+class DeadlineExceeded(Exception):
+    """No usable text arrived before the caller's deadline."""
+
+
+class GenerationFailed(Exception):
+    """Every tier tried failed with an error before the deadline was reached."""
+
+
+def _count(name: str):
+    with _hedge_lock:
+        hedge_stats[name] += 1
+
+
+def _submit(fn: Callable, *args):
+    """Run fn on the router's pool in the caller's context, so token usage is attributed to it."""
+    return _executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def hedge_delay(tier: str) -> float:
+    """Seconds to wait on a tier before sending a hedged request to the other tier."""
+    stats = tier_stats[tier]
+    threshold = stats.percentile(HEDGE_PERCENTILE) if stats.calls >= HEDGE_MIN_SAMPLES else None
+    return threshold if threshold is not None else MODEL_TIERS[tier]["latency_budget"] / 2
+
+
+def validate_output(task: str, text: str) -> List[str]:
+    """Return the reasons a generated text is unusable for the task (empty if fine)."""
+    route = TASK_ROUTES[task]
+    problems = []
+    words = len(text.split())
+    if words < route["min_words"]:
+        problems.append(f"too short ({words} words)")
+    if words > route["max_words"]:
+        problems.append(f"too long ({words} words)")
+    if text.lower().startswith(REFUSAL_MARKERS):
+        problems.append("answer is not the requested text")
+    return problems
+
+
+def call_tier(tier: str, prompt: str, task: str, clean: Callable[[str], str] = str.strip) -> Tuple[str, List[str]]:
+    """Run the prompt on one tier and record its latency; return the text and any validation problems."""
+    settings = MODEL_TIERS[tier]
+    start = time.perf_counter()
+    try:
+        text = clean(invoke(prompt, settings["model"],
+                            max_tokens=settings["max_tokens"], timeout=settings["latency_budget"]))
+    except Exception:
+        tier_stats[tier].record(time.perf_counter() - start, settings["latency_budget"], "error")
+        raise
+    problems = validate_output(task, text)
+    tier_stats[tier].record(time.perf_counter() - start, settings["latency_budget"],
+                            "rejected" if problems else "ok")
+    return text, problems
+
+
+def complete(task: str, prompt: str, clean: Callable[[str], str] = str.strip,
+             deadline: Optional[float] = None) -> str:
+    """Generate text for a task on its routed tier, falling back to the larger model.
+
+    The fallback's output is returned even if it fails validation, since it is
+    the best text available. With a deadline (a time.monotonic() value) the
+    call is hedged instead, see complete_hedged().
+    """
+    if deadline is not None:
+        return complete_hedged(task, prompt, clean, deadline)
+    tier = TASK_ROUTES[task]["tier"]
+    if tier != FALLBACK_TIER:
+        try:
+            text, problems = call_tier(tier, prompt, task, clean)
+            if not problems:
+                return text
+            print(f"Rejected {tier} output for {task} ({', '.join(problems)}), falling back to {FALLBACK_TIER}")
+        except Exception as e:
+            print(f"Error on {tier} tier for {task}, falling back to {FALLBACK_TIER}: {str(e)}")
+    text, _ = call_tier(FALLBACK_TIER, prompt, task, clean)
+    return text
+
+
+def complete_hedged(task: str, prompt: str, clean: Callable[[str], str], deadline: float) -> str:
+    """Generate text for a task, bounded by a deadline.
+
+    If the routed tier has not answered within its hedge_delay(), or its answer
+    is unusable, the same prompt is sent to the other tier and the first usable
+    answer wins. Raises DeadlineExceeded when nothing arrives in time, calls
+    still running being left to finish in the background, and
+    GenerationFailed when every attempt raised before the deadline.
+    """
+    tier = TASK_ROUTES[task]["tier"]
+    if deadline - time.monotonic() <= 0:
+        _count('deadline_misses')
+        raise DeadlineExceeded(f"No time left for {task} text")
+    attempts = {_submit(call_tier, tier, prompt, task, clean): tier}
+    hedged = False
+    rejected_text = None
+    last_error = None
+
+    while attempts:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, _ = wait(list(attempts), timeout=remaining if hedged else min(remaining, hedge_delay(tier)),
+                       return_when=FIRST_COMPLETED)
+        for future in done:
+            attempt_tier = attempts.pop(future)
+            try:
+                text, problems = future.result()
+            except Exception as e:
+                print(f"Error on {attempt_tier} tier for {task}: {str(e)}")
+                last_error = e
+                continue
+            if not problems:
+                if attempt_tier != tier:
+                    _count('hedge_wins')
+                return text
+            print(f"Rejected {attempt_tier} output for {task} ({', '.join(problems)})")
+            rejected_text = rejected_text or text
+        if not hedged and deadline - time.monotonic() > 0:
+            hedged = True
+            _count('hedged')
+            attempts[_submit(call_tier, HEDGE_TIERS[tier], prompt, task, clean)] = HEDGE_TIERS[tier]
+
+    if attempts:
+        # Still running; their tokens are recorded after the caller has reported its usage
+        from token_budget import note_abandoned
+        note_abandoned(len(attempts))
+    if rejected_text is not None:
+        return rejected_text
+    if not attempts and last_error is not None:
+        # Nothing timed out: every tier answered with an error
+        _count('all_failed')
+        raise GenerationFailed(f"No {task} text, every tier failed: {str(last_error)}") from last_error
+    _count('deadline_misses')
+    raise DeadlineExceeded(f"No usable {task} text before the deadline")
+
+
+def routing_metrics() -> Dict[str, Dict[str, Any]]:
+    """Per-tier latency and outcome counters, plus hedging counters."""
+    metrics = {tier: dict(stats.summary(), model=MODEL_TIERS[tier]["model"]) for tier, stats in tier_stats.items()}
+    with _hedge_lock:
+        metrics["hedging"] = dict(hedge_stats)
+    return metrics
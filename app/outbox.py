@@ -0,0 +1,246 @@
+import json
+import time
+import uuid
+import random
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+OUTBOX_PATH = Path("data") / "outbox.sqlite3"
+# Mutations written to Firestore per batch commit (Firestore allows 500 writes;
+# each mutation is two: the document and its idempotency marker)
+BATCH_SIZE = 20
+# Seconds the worker sleeps when there is nothing due
+POLL_INTERVAL = 5.0
+# Retry backoff: BASE_DELAY * 2^attempts seconds, capped, with jitter
+BASE_DELAY = 2.0
+MAX_DELAY = 300.0
+# A claimed batch is released for another worker after this many seconds
+LEASE_SECONDS = 60.0
+# Collection recording applied mutation keys, checked before retrying a batch
+# whose outcome is unknown (e.g. a timeout after the commit was sent). Markers
+# are deleted once their mutation leaves the outbox; expire_at lets a Firestore
+# TTL policy remove any whose deletion failed.
+APPLIED_COLLECTION = "outbox_applied"
+MARKER_TTL_SECONDS = 7 * 24 * 3600
+
+_local = threading.local()
+_wake = threading.Event()
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+# Called as fn(user_id, document, update_time) after each document reaches Firestore
+_listeners: List[Callable[[str, Dict[str, Any], Any], None]] = []
+stats = {'enqueued': 0, 'applied': 0, 'superseded': 0, 'skipped_duplicates': 0, 'failed_attempts': 0}
+
+
+def _connect() -> sqlite3.Connection:
+    """Per-thread connection; the schema is created on first use."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        OUTBOX_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(OUTBOX_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS mutations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                user_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                locked_until REAL NOT NULL DEFAULT 0,
+                last_error TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS mutations_due ON mutations (next_attempt_at, id)")
+        _local.conn = conn
+    return conn
+
+
+def enqueue_user_document(user_id: str, data: Dict[str, Any]) -> str:
+    """Durably queue a write of the user's Firestore document and return its idempotency key.
+
+    Returns once the mutation is committed to the local outbox. A queued write
+    for the same user that has not been sent yet is superseded, since each
+    write replaces the whole document.
+    """
+    key = uuid.uuid4().hex
+    now = time.time()
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        superseded = conn.execute(
+            "DELETE FROM mutations WHERE user_id = ? AND locked_until <= ?", (user_id, now)
+        ).rowcount
+        conn.execute(
+            "INSERT INTO mutations (idempotency_key, user_id, payload, created_at, next_attempt_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, user_id, json.dumps(data, default=str), now, now)
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    stats['enqueued'] += 1
+    stats['superseded'] += superseded
+    _wake.set()
+    return key
+
+
+def pending_document(user_id: str) -> Optional[Dict[str, Any]]:
+    """Newest queued document for the user, so reads see saves not yet in Firestore."""
+    row = _connect().execute(
+        "SELECT payload FROM mutations WHERE user_id = ? ORDER BY id DESC LIMIT 1", (user_id,)
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def pending_count(user_id: Optional[str] = None) -> int:
+    if user_id is None:
+        return _connect().execute("SELECT COUNT(*) FROM mutations").fetchone()[0]
+    return _connect().execute("SELECT COUNT(*) FROM mutations WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+
+def _claim_batch(now: float) -> List[tuple]:
+    """Lease due mutations, after dropping unleased ones a newer save has superseded.
+
+    A mutation is not claimed while an older one for the same user is still
+    being sent, so writes for a user reach Firestore in order.
+    """
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        stats['superseded'] += conn.execute(
+            "DELETE FROM mutations WHERE locked_until <= ? AND EXISTS ("
+            "SELECT 1 FROM mutations AS newer WHERE newer.user_id = mutations.user_id AND newer.id > mutations.id)",
+            (now,)
+        ).rowcount
+        rows = conn.execute(
+            "SELECT id, idempotency_key, user_id, payload, attempts FROM mutations AS m "
+            "WHERE next_attempt_at <= ? AND locked_until <= ? AND NOT EXISTS ("
+            "SELECT 1 FROM mutations AS older WHERE older.user_id = m.user_id AND older.id < m.id "
+            "AND older.locked_until > ?) ORDER BY id LIMIT ?",
+            (now, now, now, BATCH_SIZE)
+        ).fetchall()
+        if rows:
+            conn.execute(
+                f"UPDATE mutations SET locked_until = ? WHERE id IN ({','.join('?' * len(rows))})",
+                (now + LEASE_SECONDS, *[row[0] for row in rows])
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return rows
+
+
+def drain_once(get_db: Callable[[], Any]) -> int:
+    """Send one batch of due mutations to Firestore; returns how many left the outbox."""
+    rows = _claim_batch(time.time())
+    if not rows:
+        return 0
+    conn = _connect()
+    ids = [row[0] for row in rows]
+    # Rows are in id order; only the newest write per user needs sending
+    newest = {row[2]: row[1] for row in rows}
+    try:
+        db = get_db()
+        applied_refs = {row[1]: db.collection(APPLIED_COLLECTION).document(row[1]) for row in rows}
+        # Only batches that may have been committed before need the duplicate check
+        already_applied = set()
+        retried = [applied_refs[row[1]] for row in rows if row[4] > 0]
+        if retried:
+            already_applied = {snapshot.id for snapshot in db.get_all(retried) if snapshot.exists}
+
+        batch = db.batch()
+        written = []
+        for _, key, user_id, payload, _ in rows:
+            if newest[user_id] != key:
+                stats['superseded'] += 1
+                continue
+            if key in already_applied:
+                stats['skipped_duplicates'] += 1
+                continue
+            document = json.loads(payload)
+            batch.set(db.collection("users").document(user_id), document)
+            batch.set(applied_refs[key], {
+                'user_id': user_id,
+                'applied_at': time.time(),
+                'expire_at': datetime.now(timezone.utc) + timedelta(seconds=MARKER_TTL_SECONDS),
+            })
+            written.append((user_id, document))
+        results = batch.commit() if written else []
+    except Exception as e:
+        stats['failed_attempts'] += 1
+        print(f"Error syncing {len(rows)} queued save(s) to Firestore: {str(e)}")
+        for row in rows:
+            # A newer save for the user replaces this one; retrying it later
+            # would overwrite the newer document in Firestore
+            newer = conn.execute(
+                "SELECT 1 FROM mutations WHERE user_id = ? AND id > ? LIMIT 1", (row[2], row[0])
+            ).fetchone()
+            if newer or newest[row[2]] != row[1]:
+                conn.execute("DELETE FROM mutations WHERE id = ?", (row[0],))
+                stats['superseded'] += 1
+                continue
+            delay = min(BASE_DELAY * 2 ** row[4], MAX_DELAY) * random.uniform(0.8, 1.2)
+            conn.execute(
+                "UPDATE mutations SET attempts = attempts + 1, next_attempt_at = ?, locked_until = 0, "
+                "last_error = ? WHERE id = ?",
+                (time.time() + delay, str(e), row[0])
+            )
+        return 0
+
+    conn.execute(f"DELETE FROM mutations WHERE id IN ({','.join('?' * len(ids))})", ids)
+    stats['applied'] += len(written)
+    _delete_markers(db, [applied_refs[row[1]] for row in rows])
+    # Write results follow the batch order: document, marker, document, marker, ...
+    for index, (user_id, document) in enumerate(written):
+        update_time = getattr(results[2 * index], 'update_time', None) if len(results) > 2 * index else None
+        for listener in _listeners:
+            try:
+                listener(user_id, document, update_time)
+            except Exception as e:
+                print(f"Error notifying outbox listener: {str(e)}")
+    return len(rows)
+
+
+def _delete_markers(db, refs: List[Any]):
+    """Remove idempotency markers of mutations that have left the outbox (best effort)."""
+    try:
+        batch = db.batch()
+        for ref in refs:
+            batch.delete(ref)
+        batch.commit()
+    except Exception as e:
+        print(f"Error deleting {len(refs)} outbox marker(s): {str(e)}")
+
+
+def add_listener(listener: Callable[[str, Dict[str, Any], Any], None]):
+    """Register a callback for documents written to Firestore (e.g. to refresh caches)."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def _run(get_db: Callable[[], Any]):
+    while True:
+        try:
+            if drain_once(get_db):
+                continue
+        except Exception as e:
+            print(f"Error in Firestore outbox worker: {str(e)}")
+        _wake.wait(POLL_INTERVAL)
+        _wake.clear()
+
+
+def start_worker(get_db: Callable[[], Any]):
+    """Start the background drain thread once per process."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_run, args=(get_db,), name="firestore-outbox", daemon=True)
+            _worker.start()
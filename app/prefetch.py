@@ -0,0 +1,119 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Dict, Optional
+
+# I/O pool for the individual loads, and a separate pool for the per-user
+# coordinator so a coordinator waiting on its loads can never starve them.
+_io_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="prefetch-io")
+_coordinator_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+
+# Seconds a finished prefetch is kept; a session applies it within a rerun or
+# two, so this only bounds what abandoned sessions leave behind
+PREFETCH_TTL = 300
+
+_lock = threading.Lock()
+_prefetches: Dict[str, "UserPrefetch"] = {}
+
+
+class UserPrefetch:
+    """Data loaded in the background for one signed-in user."""
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.started_at = time.time()
+        self.document: Optional[Dict[str, Any]] = None
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.profile_image: Optional[bytes] = None
+        self.profile_image_path: Optional[str] = None
+        self._done = threading.Event()
+
+    @property
+    def resume_data(self) -> Optional[Dict[str, Any]]:
+        """Firestore is the source of truth; the local snapshot is the fallback."""
+        return self.document or self.snapshot
+
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def age(self) -> float:
+        return time.time() - self.started_at
+
+
+def _result(future: Future) -> Any:
+    """Return the future's result, treating any loader error as 'no data'."""
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"Prefetch load failed: {str(e)}")
+        return None
+
+
+def _profile_pic_path(data: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not data:
+        return None
+    return data.get('personal_info', {}).get('profile_pic')
+
+
+def _run(prefetch: UserPrefetch,
+         load_document: Callable[[str], Optional[Dict[str, Any]]],
+         load_snapshot: Callable[[str], Optional[Dict[str, Any]]],
+         load_image: Callable[[str], Optional[bytes]]):
+    """Load document, snapshot and image concurrently, then mark the prefetch ready."""
+    try:
+        document_future = _io_executor.submit(load_document, prefetch.user_id)
+        snapshot_future = _io_executor.submit(load_snapshot, prefetch.user_id)
+
+        # The local snapshot usually resolves first, so start on its image
+        # while the Firestore round-trip is still in flight.
+        prefetch.snapshot = _result(snapshot_future)
+        image_path = _profile_pic_path(prefetch.snapshot)
+        image_future = _io_executor.submit(load_image, image_path) if image_path else None
+
+        prefetch.document = _result(document_future)
+        document_path = _profile_pic_path(prefetch.document)
+        if document_path and document_path != image_path:
+            image_path = document_path
+            image_future = _io_executor.submit(load_image, image_path)
+
+        if image_future is not None:
+            prefetch.profile_image = _result(image_future)
+            prefetch.profile_image_path = image_path
+    finally:
+        prefetch._done.set()
+
+
+def _evict_expired():
+    """Drop finished prefetches older than PREFETCH_TTL (caller holds _lock)."""
+    for user_id, prefetch in list(_prefetches.items()):
+        if prefetch.ready() and prefetch.age() > PREFETCH_TTL:
+            del _prefetches[user_id]
+
+
+def start_prefetch(user_id: str,
+                   load_document: Callable[[str], Optional[Dict[str, Any]]],
+                   load_snapshot: Callable[[str], Optional[Dict[str, Any]]],
+                   load_image: Callable[[str], Optional[bytes]]) -> UserPrefetch:
+    """Start loading a user's saved data in the background and return immediately."""
+    prefetch = UserPrefetch(user_id)
+    with _lock:
+        _evict_expired()
+        _prefetches[user_id] = prefetch
+    _coordinator_executor.submit(_run, prefetch, load_document, load_snapshot, load_image)
+    return prefetch
+
+
+def get_prefetch(user_id: str) -> Optional[UserPrefetch]:
+    """Return the most recent prefetch for a user, if any."""
+    with _lock:
+        _evict_expired()
+        return _prefetches.get(user_id)
+
+
+def invalidate_prefetch(user_id: str):
+    """Drop a user's cached prefetch so the next read goes back to the source."""
+    with _lock:
+        _prefetches.pop(user_id, None)
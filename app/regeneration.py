@@ -0,0 +1,59 @@
+import hashlib
+from typing import Any, Dict
+
+from speculative import hash_inputs
+
+# Generation modes for the Generate buttons
+MODE_MISSING = "missing"   # only fill empty fields
+MODE_CHANGED = "changed"   # also refresh generated text whose inputs changed
+MODE_ALL = "all"           # regenerate everything, including edited text
+
+# Each entry records, per generated field, the hash of the inputs the text was
+# derived from and a hash of the text itself (to detect user edits).
+GENERATED_KEY = '_generated'
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.strip().encode('utf-8')).hexdigest()
+
+
+def profile_summary_key(resume_data: Dict[str, Any]) -> str:
+    """Hash of everything generate_profile_summary reads."""
+    personal = resume_data.get('personal_info', {})
+    return hash_inputs(
+        'profile_summary',
+        personal.get('full_name', ''),
+        resume_data.get('skills', []),
+        [[exp.get('position', ''), exp.get('company', ''), exp.get('technologies', ''),
+          exp.get('start_date', ''), exp.get('end_date', '')] for exp in resume_data.get('experience', [])],
+        [[edu.get('degree', ''), edu.get('institution', '')] for edu in resume_data.get('education', [])[:1]]
+    )
+
+
+def is_user_edited(entry: Dict[str, Any], field: str) -> bool:
+    """True if the text was written or changed by the user rather than generated."""
+    text = entry.get(field) or ''
+    if not text.strip():
+        return False
+    record = entry.get(GENERATED_KEY, {}).get(field)
+    return record is None or record['text'] != _text_hash(text)
+
+
+def needs_generation(entry: Dict[str, Any], field: str, inputs_key: str, mode: str) -> bool:
+    """Decide whether a generated field should be (re)generated in the given mode."""
+    text = entry.get(field) or ''
+    if mode == MODE_ALL or not text.strip():
+        return True
+    if mode == MODE_CHANGED:
+        record = entry.get(GENERATED_KEY, {}).get(field)
+        return not is_user_edited(entry, field) and record['inputs'] != inputs_key
+    return False
+
+
+def mark_generated(entry: Dict[str, Any], field: str, inputs_key: str):
+    """Record which inputs produced the entry's current text."""
+    entry.setdefault(GENERATED_KEY, {})[field] = {
+        'inputs': inputs_key,
+        'text': _text_hash(entry.get(field) or ''),
+    }
+
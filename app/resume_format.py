@@ -0,0 +1,44 @@
+import copy
+from datetime import datetime
+from typing import Any, Dict
+
+
+def format_date(date_str: str) -> str:
+    """Format date string to a more readable format."""
+    if date_str.lower() == 'present':
+        return 'Present'
+
+    try:
+        # Try parsing as YYYY-MM
+        if len(date_str) == 7:
+            date = datetime.strptime(date_str, '%Y-%m')
+            return date.strftime('%B %Y')
+        # Try parsing as YYYY
+        elif len(date_str) == 4:
+            return date_str
+    except ValueError:
+        return date_str
+
+    return date_str
+
+
+def prepare_resume_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of the resume data formatted for rendering.
+
+    The input is left untouched so the form keeps its YYYY-MM dates.
+    """
+    data = copy.deepcopy(data)
+
+    # Format dates
+    for exp in data.get('experience', []):
+        if exp.get('start_date'):
+            exp['start_date'] = format_date(exp['start_date'])
+        if exp.get('end_date'):
+            exp['end_date'] = format_date(exp['end_date'])
+
+    # Format education dates
+    for edu in data.get('education', []):
+        if edu.get('year'):
+            edu['year'] = format_date(edu['year'])
+
+    return data
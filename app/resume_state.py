@@ -0,0 +1,112 @@
+from typing import Any, Dict, List
+
+from validation import FieldError, RESUME_SCHEMA, validate_entry, validate_section
+
+# Personal fields that count towards form completion
+REQUIRED_PERSONAL = ['full_name', 'email', 'phone']
+# Sections that count towards form completion once they have an entry
+COUNTED_SECTIONS = ['experience', 'education', 'skills']
+LIST_SECTIONS = [section for section, spec in RESUME_SCHEMA.items() if spec['kind'] != 'object']
+
+
+class ResumeTracker:
+    """Derived state (completion, counts, validation) kept in step with resume_data.
+
+    All mutations of the tracked resume_data should go through this class so the
+    derived values stay current; reads are then O(1) no matter how many entries
+    a section holds. Wholesale replacements of resume_data are handled by building
+    a new tracker (see `tracker_for`).
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.data.setdefault('personal_info', {})
+        for section in LIST_SECTIONS:
+            self.data.setdefault(section, [])
+        self.counts: Dict[str, int] = {section: len(self.data[section]) for section in LIST_SECTIONS}
+        self._skills = set(self.data['skills'])
+        self._personal_filled = sum(1 for field in REQUIRED_PERSONAL if self.data['personal_info'].get(field))
+        self._personal_errors = validate_section('personal_info', self.data['personal_info'])
+        # Per-entry errors without indices; indices are filled in on read since removals shift them
+        self._entry_errors: Dict[str, List[List[FieldError]]] = {
+            section: [validate_entry(section, entry) for entry in self.data[section]]
+            for section in LIST_SECTIONS
+        }
+        self._error_count = len(self._personal_errors) + sum(
+            len(entry) for entries in self._entry_errors.values() for entry in entries
+        )
+
+    # ------------------- Mutations -------------------
+
+    def update_personal_info(self, fields: Dict[str, Any]):
+        personal = self.data['personal_info']
+        personal.update(fields)
+        self._personal_filled = sum(1 for field in REQUIRED_PERSONAL if personal.get(field))
+        self._error_count -= len(self._personal_errors)
+        self._personal_errors = validate_section('personal_info', personal)
+        self._error_count += len(self._personal_errors)
+
+    def add_item(self, section: str, item: Any):
+        errors = validate_entry(section, item)
+        self.data[section].append(item)
+        self._entry_errors[section].append(errors)
+        self._error_count += len(errors)
+        self.counts[section] += 1
+        if section == 'skills':
+            self._skills.add(item)
+
+    def update_item(self, section: str, index: int, item: Any):
+        errors = validate_entry(section, item)
+        if section == 'skills':
+            self._skills.discard(self.data[section][index])
+            self._skills.add(item)
+        self.data[section][index] = item
+        self._error_count += len(errors) - len(self._entry_errors[section][index])
+        self._entry_errors[section][index] = errors
+
+    def remove_item(self, section: str, index: int):
+        item = self.data[section].pop(index)
+        self._error_count -= len(self._entry_errors[section].pop(index))
+        self.counts[section] -= 1
+        if section == 'skills' and item not in self.data[section]:
+            self._skills.discard(item)
+
+    # ------------------- Reads -------------------
+
+    def has_skill(self, skill: str) -> bool:
+        return skill in self._skills
+
+    def completion_percentage(self) -> float:
+        """Same scoring as before: required personal fields plus each non-empty counted section."""
+        filled_sections = sum(1 for section in COUNTED_SECTIONS if self.counts[section])
+        total_fields = len(REQUIRED_PERSONAL) + filled_sections
+        completed_fields = self._personal_filled + filled_sections
+        return (completed_fields / total_fields) * 100 if total_fields > 0 else 0
+
+    def checklist(self) -> List[str]:
+        """Items for the 'Resume Completeness' review."""
+        return [
+            "✅ Personal Information" if self.data['personal_info'].get('full_name') else "❌ Personal Information",
+            "✅ Work Experience" if self.counts['experience'] else "⚠️ Work Experience (Optional)",
+            "✅ Education" if self.counts['education'] else "⚠️ Education (Optional)",
+            "✅ Skills" if self.counts['skills'] else "⚠️ Skills (Recommended)",
+        ]
+
+    def error_count(self) -> int:
+        return self._error_count
+
+    def errors(self) -> List[FieldError]:
+        errors = list(self._personal_errors)
+        for section in LIST_SECTIONS:
+            for i, entry_errors in enumerate(self._entry_errors[section]):
+                errors.extend(error._replace(index=i) for error in entry_errors)
+        return errors
+
+
+def tracker_for(session_state) -> ResumeTracker:
+    """Return the session's tracker, rebuilding it if resume_data was replaced."""
+    tracker = session_state.get('resume_tracker')
+    if tracker is None or tracker.data is not session_state.resume_data:
+        tracker = ResumeTracker(session_state.resume_data)
+        session_state.resume_tracker = tracker
+    return tracker
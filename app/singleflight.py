@@ -0,0 +1,103 @@
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait and receive the same result (or exception). Nothing is cached
+    once the call finishes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.requests = 0
+        self.executions = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.requests += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            shared = self.requests - self.executions
+            return {
+                'name': self.name,
+                'requests': self.requests,
+                'executions': self.executions,
+                'shared': shared,
+                'dedupe_ratio': shared / self.requests if self.requests else 0.0,
+                'in_flight': len(self._calls),
+            }
+
+
+def flight_key(*parts: str) -> str:
+    """Hash the parts that identify a computation (model + prompt, template + HTML, ...)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+# Process-wide groups shared by summarizer_agent and ResumeGenerator
+llm_flight = SingleFlight('llm')
+render_flight = SingleFlight('render')
+
+
+def all_metrics() -> Dict[str, Dict[str, Any]]:
+    return {group.name: group.metrics() for group in (llm_flight, render_flight)}
+
+
+if __name__ == "__main__":
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    demo = SingleFlight('demo')
+
+    def slow_generation(key: str) -> str:
+        time.sleep(0.2)
+        return f"description for {key}"
+
+    # 60 concurrent requests over 3 distinct prompts, e.g. a class of bootcamp
+    # graduates generating the same capstone project description at once
+    with ThreadPoolExecutor(max_workers=60) as pool:
+        keys = [f"project-{i % 3}" for i in range(60)]
+        list(pool.map(lambda key: demo.do(key, lambda: slow_generation(key)), keys))
+    print(f"🔹 {demo.metrics()}")
@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Set SPECULATIVE_GENERATION=0 to only generate on the Generate click (also
+# the case with JOB_WORKERS=0, see speculation_active)
+SPECULATION_ENABLED = os.getenv("SPECULATIVE_GENERATION", "1") != "0"
+# Pending suggestions nobody picked up are dropped after this many seconds
+SPECULATION_TTL = 15 * 60
+MAX_PENDING = 500
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculative")
+_lock = threading.Lock()
+# input hash -> suggestion; sessions whose entries have the same inputs share one
+_pending: Dict[str, "_Suggestion"] = {}
+stats = {'submitted': 0, 'shared': 0, 'hits': 0, 'misses': 0, 'cancelled': 0}
+
+
+class _Suggestion:
+    """A suggestion being computed, and how many entries are waiting for it."""
+
+    def __init__(self, submitted_at: float, future: Future):
+        self.submitted_at = submitted_at
+        self.future = future
+        self.waiters = 1
+
+
+def hash_inputs(task: str, *inputs: Any) -> str:
+    """Stable hash of a generation task and the inputs its text is derived from."""
+    payload = json.dumps([task, *inputs], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def job_description_key(exp: Dict[str, Any]) -> str:
+    return hash_inputs('job_description', exp.get('company', ''), exp.get('position', ''),
+                       exp.get('start_date', ''), exp.get('end_date', ''), exp.get('technologies', ''))
+
+
+def project_description_key(project: Dict[str, Any]) -> str:
+    return hash_inputs('project_description', project.get('name', ''), project.get('technologies', ''))
+
+
+def _count(name: str):
+    with _lock:
+        stats[name] += 1
+
+
+def _expire(now: float):
+    """Drop stale suggestions; caller holds the lock."""
+    for key, suggestion in list(_pending.items()):
+        if now - suggestion.submitted_at > SPECULATION_TTL:
+            suggestion.future.cancel()
+            del _pending[key]
+    while len(_pending) > MAX_PENDING:
+        key = next(iter(_pending))
+        _pending.pop(key).future.cancel()
+
+
+def _tracked(compute: Callable[[], str]) -> Tuple[str, Any]:
+    from token_budget import track_usage
+
+    with track_usage() as usage:
+        return compute(), usage
+
+
+def speculation_active() -> bool:
+    """Whether suggestions can be used: they live in this process's memory, so
+    with JOB_WORKERS=0 Generate runs in worker processes that never see them."""
+    from worker import JOB_WORKERS
+    return SPECULATION_ENABLED and JOB_WORKERS > 0
+
+
+def submit(key: str, compute: Callable[[], str]) -> bool:
+    """Start computing a suggestion in the background, or join the one already pending.
+
+    Returns True if a new computation was started. Either way the caller holds
+    one reference, released by cancel() or resolve().
+    """
+    if not speculation_active():
+        return False
+    now = time.time()
+    with _lock:
+        _expire(now)
+        if key in _pending:
+            _pending[key].waiters += 1
+            stats['shared'] += 1
+            return False
+        _pending[key] = _Suggestion(now, _executor.submit(_tracked, compute))
+        stats['submitted'] += 1
+    return True
+
+
+def cancel(key: str):
+    """Discard a suggestion whose entry was edited or removed, once no other entry waits for it."""
+    with _lock:
+        suggestion = _pending.get(key)
+        if suggestion is None:
+            return
+        suggestion.waiters -= 1
+        if suggestion.waiters <= 0:
+            del _pending[key]
+            suggestion.future.cancel()
+            stats['cancelled'] += 1
+
+
+def _take(key: str) -> Optional[Future]:
+    """Release one reference to a pending suggestion and return its future."""
+    with _lock:
+        suggestion = _pending.get(key)
+        if suggestion is None:
+            return None
+        suggestion.waiters -= 1
+        if suggestion.waiters <= 0:
+            del _pending[key]
+        return suggestion.future
+
+
+def resolve(key: str, compute: Callable[[], str], timeout: Optional[float] = None) -> str:
+    """Use the pending suggestion for these inputs if there is one, otherwise compute now.
+
+    A suggestion still in flight is awaited rather than duplicated. Its token
+    usage is attributed to the caller's context once it is used.
+    """
+    future = _take(key)
+    if future is not None and not future.cancelled():
+        try:
+            result, usage = future.result(timeout=timeout)
+            _count('hits')
+            from token_budget import add_to_current
+            add_to_current(usage)
+            return result
+        except Exception as e:
+            print(f"Speculative generation failed, generating again: {str(e)}")
+            if not future.done():
+                # Timed out; its tokens are never charged to this caller
+                from token_budget import note_abandoned
+                note_abandoned()
+    _count('misses')
+    return compute()
+
+
+# ------------------- Generation Tasks -------------------
+
+def _job_description(exp: Dict[str, Any], deadline: Optional[float] = None) -> str:
+    from summarizer_agent import generate_job_description
+    return generate_job_description(
+        exp['company'],
+        exp['position'],
+        exp['start_date'],
+        exp['end_date'],
+        exp.get('technologies', ''),
+        deadline=deadline
+    )
+
+
+def _project_description(project: Dict[str, Any], deadline: Optional[float] = None) -> str:
+    from summarizer_agent import generate_project_description
+    return generate_project_description(
+        project['name'],
+        project['technologies'].split(', '),
+        deadline=deadline
+    )
+
+
+def speculate_job_description(exp: Dict[str, Any]) -> bool:
+    """Start generating a job description as soon as the experience is saved."""
+    snapshot = dict(exp)
+    return submit(job_description_key(snapshot), lambda: _job_description(snapshot))
+
+
+def speculate_project_description(project: Dict[str, Any]) -> bool:
+    """Start generating a project description as soon as the project is added."""
+    snapshot = dict(project)
+    return submit(project_description_key(snapshot), lambda: _project_description(snapshot))
+
+
+def _time_left(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+
+def resolve_job_description(exp: Dict[str, Any], deadline: Optional[float] = None) -> str:
+    return resolve(job_description_key(exp), lambda: _job_description(exp, deadline), _time_left(deadline))
+
+
+def resolve_project_description(project: Dict[str, Any], deadline: Optional[float] = None) -> str:
+    return resolve(project_description_key(project), lambda: _project_description(project, deadline),
+                   _time_left(deadline))
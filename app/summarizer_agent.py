@@ -1,18 +1,8 @@
-import os
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
-from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-
-# Load environment variables from .env
-load_dotenv()
-groq_api_key = os.getenv("GROQ_API_KEY")
-
-# Initialize Groq LLM with LLaMA 3.3-70b-versatile
-llm = ChatGroq(
-    api_key=groq_api_key,
-    model_name="llama-3.3-70b-versatile"
-)
+from itertools import chain
+from model_router import complete
+from token_budget import clip_field, take_unique, split_technologies, MAX_KEY_TECHNOLOGIES
 
 def clean_generated_text(text: str) -> str:
     """Clean generated text by removing quotes and extra whitespace."""
@@ -32,7 +22,8 @@ def clean_generated_text(text: str) -> str:
 
 # ------------------- Summary Generator -------------------
 
-def generate_profile_summary(info: Dict[str, str], skills: List[str], experience: List[Dict] = None, education: List[Dict] = None) -> str:
+def generate_profile_summary(info: Dict[str, str], skills: List[str], experience: List[Dict] = None, education: List[Dict] = None,
+                             deadline: Optional[float] = None) -> str:
     # Determine primary role based on experience and skills
     primary_role = "Professional"
     if experience:
@@ -48,24 +39,10 @@ def generate_profile_summary(info: Dict[str, str], skills: List[str], experience
         elif any(keyword in position for keyword in ['full-stack', 'fullstack', 'frontend', 'backend']):
             primary_role = "Full-Stack Developer"
     
-    # Identify key technologies and achievements
-    key_technologies = []
-    achievements = []
-    
-    # Extract technologies from experience
-    if experience:
-        for exp in experience:
-            tech = exp.get('technologies', '')
-            if tech:
-                key_technologies.extend([t.strip() for t in tech.split(',')])
-    
-    # Add skills if not already covered
-    for skill in skills:
-        if skill not in key_technologies:
-            key_technologies.append(skill)
-    
-    # Limit to top 5-6 most relevant technologies
-    key_technologies = key_technologies[:6]
+    # Identify key technologies: experience technologies first, then skills not
+    # already covered, limited to the top 6 without building the full list
+    experience_technologies = (t.strip() for exp in (experience or []) for t in exp.get('technologies', '').split(','))
+    key_technologies = take_unique(chain(experience_technologies, skills), MAX_KEY_TECHNOLOGIES)
     
     # Determine years of experience
     years_exp = 0
@@ -86,14 +63,14 @@ def generate_profile_summary(info: Dict[str, str], skills: List[str], experience
         You're a professional resume writer. Generate an impressive first-person profile summary (40–50 words) for a {primary_role}.
 
         Candidate Details:
-        Name: {info.get('full_name', '')}
+        Name: {clip_field('name', info.get('full_name', ''))}
         Primary Role: {primary_role}
         Years of Experience: {years_exp} years
         Key Technologies: {', '.join(key_technologies)}
         
-        Recent Experience: {experience[0].get('position', '') if experience else 'None'} at {experience[0].get('company', '') if experience else 'None'}
+        Recent Experience: {clip_field('position', experience[0].get('position', '')) if experience else 'None'} at {clip_field('company', experience[0].get('company', '')) if experience else 'None'}
         
-        Education: {education[0].get('degree', '') if education else 'None'} from {education[0].get('institution', '') if education else 'None'}
+        Education: {clip_field('degree', education[0].get('degree', '')) if education else 'None'} from {clip_field('institution', education[0].get('institution', '')) if education else 'None'}
 
         Guidelines:
         - Start with "I'm a [role]" or "Experienced [role]"
@@ -113,17 +90,16 @@ def generate_profile_summary(info: Dict[str, str], skills: List[str], experience
         Generate a compelling summary that showcases specific achievements and technical expertise.
         IMPORTANT: Do not wrap your response in quotes. Return the summary directly without any quotation marks.
         """
-    response = llm.invoke(prompt).content.strip()
-    return clean_generated_text(response)
+    return complete('profile_summary', prompt, clean_generated_text, deadline)
 
 # ------------------- Project Description Generator -------------------
 
-def generate_project_description(name: str, technologies: List[str]) -> str:
+def generate_project_description(name: str, technologies: List[str], deadline: Optional[float] = None) -> str:
     prompt = f"""
         You are writing a resume project description for a technical or non-technical project.
 
-        Project Name: {name}  
-        Technologies: {', '.join(technologies)}
+        Project Name: {clip_field('project_name', name)}  
+        Technologies: {', '.join(take_unique(technologies, MAX_KEY_TECHNOLOGIES))}
 
         Write a **concise 1-line project description (aim for 40-50 words)** that includes:
         - What the project does
@@ -136,18 +112,18 @@ def generate_project_description(name: str, technologies: List[str]) -> str:
         Example:  
         Built a resume builder using Streamlit and LangChain to auto-generate tailored resumes from user inputs, reducing manual effort by 80%; integrated PDF export and multiple template options for customizable outputs.
         """
-    response = llm.invoke(prompt).content.strip()
-    return clean_generated_text(response)
+    return complete('project_description', prompt, clean_generated_text, deadline)
 
 # ------------------- Job Description Generator -------------------
 
-def generate_job_description(company: str, position: str, start: str, end: str, technologies: str = "") -> str:
+def generate_job_description(company: str, position: str, start: str, end: str, technologies: str = "",
+                             deadline: Optional[float] = None) -> str:
     prompt = f"""
         You are writing a concise, impactful job experience summary for a resume.
 
-        Company: {company}
-        Role: {position}
-        Technologies: {technologies}
+        Company: {clip_field('company', company)}
+        Role: {clip_field('position', position)}
+        Technologies: {', '.join(split_technologies(technologies))}
 
         Write a single, direct 1–2 line summary (max 50 words) that includes:
         - What you did in this role (main responsibility or achievement)
@@ -160,8 +136,7 @@ def generate_job_description(company: str, position: str, start: str, end: str,
         Example:
         Developed scalable REST APIs using Python and FastAPI, improving data processing speed by 30% for financial analytics. Led a team of 3 engineers and integrated CI/CD pipelines with Docker and GitHub Actions.
         """
-    response = llm.invoke(prompt).content.strip()
-    return clean_generated_text(response)
+    return complete('job_description', prompt, clean_generated_text, deadline)
 
 # ------------------- Example Usage -------------------
 
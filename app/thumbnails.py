@@ -0,0 +1,166 @@
+import io
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Width of gallery thumbnails in pixels
+THUMBNAIL_WIDTH = int(os.getenv("THUMBNAIL_WIDTH", "240"))
+THUMBNAIL_DIR = Path("data") / "thumbnails"
+MEMORY_CACHE_SIZE = 256
+# Renders queued at once; while a user types, older resume states are not worth queuing
+MAX_PENDING = 6
+
+_lock = threading.Lock()
+# thumbnail key -> PNG bytes
+_memory: "OrderedDict[str, bytes]" = OrderedDict()
+# thumbnail key -> id of the preview job rendering it
+_pending: Dict[str, str] = {}
+# Keys whose render failed, so a broken template or missing dependency is not retried every rerun
+_failed = set()
+
+
+def template_version(generator, template_name: str) -> str:
+    """Changes whenever the template or its stylesheet is edited."""
+    html_path = generator.template_dir / generator.templates[template_name]
+    css_path = generator.template_dir / "css" / f"{template_name}.css"
+    return f"{os.path.getmtime(html_path):.0f}-{os.path.getmtime(css_path):.0f}"
+
+
+def thumbnail_key(generator, template_name: str, data: Dict[str, Any]) -> str:
+    payload = json.dumps([template_name, template_version(generator, template_name), THUMBNAIL_WIDTH, data],
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_thumbnail(generator, template_name: str, data: Dict[str, Any]) -> bytes:
+    """Lay out the resume, keep only its first page and rasterize it to a small PNG."""
+    from weasyprint import HTML
+    from resume_generator import get_font_config
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        raise RuntimeError("Thumbnails need pypdfium2 (pip install pypdfium2)")
+
+    html_content = generator.render_template(template_name, data, inline_css=False)
+    # Small images are plenty for a thumbnail and much cheaper to lay out
+    html_content = generator._optimize_images(html_content, "compact")
+    document = HTML(string=html_content).render(stylesheets=[generator.stylesheet(template_name)],
+                                                font_config=get_font_config())
+    first_page_pdf = document.copy(document.pages[:1]).write_pdf()
+
+    pdf = pdfium.PdfDocument(first_page_pdf)
+    try:
+        page = pdf[0]
+        image = page.render(scale=THUMBNAIL_WIDTH / page.get_width()).to_pil()
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue()
+    finally:
+        pdf.close()
+
+
+def _remember(key: str, png: bytes):
+    with _lock:
+        _memory[key] = png
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+def get_thumbnail(generator, template_name: str, data: Dict[str, Any]) -> Optional[bytes]:
+    """Cached thumbnail (memory, then disk) or None; never renders."""
+    key = thumbnail_key(generator, template_name, data)
+    with _lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            return _memory[key]
+    path = THUMBNAIL_DIR / f"{key}.png"
+    if path.exists():
+        png = path.read_bytes()
+        _remember(key, png)
+        return png
+    return None
+
+
+def store_thumbnail(key: str, png: bytes):
+    """Save a rendered thumbnail where every app process finds it (called by job workers)."""
+    THUMBNAIL_DIR.mkdir(parents=True, exist_ok=True)
+    (THUMBNAIL_DIR / f"{key}.png").write_bytes(png)
+    _remember(key, png)
+
+
+def _settle_pending():
+    """Forget preview jobs that have finished, remembering the ones that failed."""
+    from job_queue import FAILED, get_job
+    with _lock:
+        # An empty id is a job still being submitted
+        pending = [(key, job_id) for key, job_id in _pending.items() if job_id]
+    for key, job_id in pending:
+        job = get_job(job_id)
+        if job is None or job.finished:
+            with _lock:
+                _pending.pop(key, None)
+                if job is None or job.status == FAILED:
+                    _failed.add(key)
+
+
+def request_thumbnail(generator, template_name: str, data: Dict[str, Any], user_id: Optional[str] = None,
+                      priority: str = "preview") -> Optional[bytes]:
+    """Return the cached thumbnail, or queue a job to render it and return None.
+
+    Preview jobs run ahead of PDF and batch work on the shared job workers.
+    """
+    from job_queue import submit
+
+    png = get_thumbnail(generator, template_name, data)
+    if png is not None:
+        return png
+    _settle_pending()
+    key = thumbnail_key(generator, template_name, data)
+    with _lock:
+        if key in _pending or key in _failed or len(_pending) >= MAX_PENDING:
+            return None
+        # Reserved under the lock so concurrent reruns queue one job per key
+        _pending[key] = ''
+    snapshot = json.loads(json.dumps(data, default=str))
+    job_id = submit("preview", {'template_name': template_name, 'resume_data': snapshot, 'key': key},
+                    user_id, priority)
+    with _lock:
+        _pending[key] = job_id
+    return None
+
+
+def precompute_sample_thumbnails(generator):
+    """Queue thumbnails of the sample resume for every template (at server start), as batch work."""
+    from sample_data import SAMPLE_RESUME_DATA
+    for template_name in generator.templates:
+        request_thumbnail(generator, template_name, SAMPLE_RESUME_DATA, priority="batch")
+
+
+def _precompute():
+    try:
+        from resume_generator import ResumeGenerator
+        precompute_sample_thumbnails(ResumeGenerator())
+    except Exception as e:
+        print(f"Error queuing sample thumbnails: {str(e)}")
+
+
+def precompute_in_background():
+    """Queue the sample thumbnails on a daemon thread, so server start does not wait for it."""
+    threading.Thread(target=_precompute, name="thumbnail-precompute", daemon=True).start()
+
+
+if __name__ == "__main__":
+    import time
+    from resume_generator import ResumeGenerator
+    from sample_data import SAMPLE_RESUME_DATA
+
+    generator = ResumeGenerator()
+    for template_name in generator.templates:
+        start = time.perf_counter()
+        png = render_thumbnail(generator, template_name, SAMPLE_RESUME_DATA)
+        print(f"🔹 {template_name:<11} {(time.perf_counter() - start) * 1000:7.1f} ms  {len(png) / 1024:.1f} KB")
@@ -0,0 +1,185 @@
+import math
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional
+
+# Rough tokenizer-free estimate; Llama tokenizers average about 4 characters per English token
+CHARS_PER_TOKEN = 4
+
+# Upper bound, in tokens, for each user field interpolated into a prompt
+FIELD_TOKEN_LIMITS = {
+    'name': 16,
+    'position': 16,
+    'company': 16,
+    'degree': 24,
+    'institution': 24,
+    'project_name': 24,
+    'technology': 8,
+}
+
+# Most technologies listed in a profile summary prompt
+MAX_KEY_TECHNOLOGIES = 6
+
+# USD per million (input, output) tokens
+MODEL_PRICES = {
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def clip_text(text: Any, max_tokens: int) -> str:
+    """Collapse whitespace and cut the text at a word boundary to fit the token limit."""
+    text = ' '.join(str(text or '').split())
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    clipped = text[:max_chars - 3].rsplit(' ', 1)[0] or text[:max_chars - 3]
+    return clipped.rstrip(' ,;') + '...'
+
+
+def clip_field(field: str, value: Any) -> str:
+    return clip_text(value, FIELD_TOKEN_LIMITS[field])
+
+
+def take_unique(items: Iterable[str], limit: int) -> List[str]:
+    """First `limit` distinct non-empty items (case-insensitive), each clipped to a technology name's size.
+
+    Stops reading as soon as the limit is reached, so long inputs cost nothing extra.
+    """
+    selected, seen = [], set()
+    for item in items:
+        item = clip_field('technology', item)
+        if item and item.lower() not in seen:
+            seen.add(item.lower())
+            selected.append(item)
+            if len(selected) == limit:
+                break
+    return selected
+
+
+def split_technologies(technologies: str, limit: int = MAX_KEY_TECHNOLOGIES) -> List[str]:
+    return take_unique((t.strip() for t in (technologies or '').split(',')), limit)
+
+
+def cost_of(model: str, input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICES.get(model, MODEL_PRICES["llama-3.3-70b-versatile"])
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+# ------------------- Usage Accounting -------------------
+
+class Usage:
+    """Token and cost totals for one scope (a model, or one resume's generation).
+
+    `shared` counts calls whose result came from another caller's identical
+    in-flight request; their tokens are included here but were only spent
+    once. `abandoned` counts calls left running at a deadline, whose tokens
+    arrive after the scope has been reported and are not in its totals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+        self.shared = 0
+        self.abandoned = 0
+
+    def add(self, input_tokens: int, output_tokens: int, cost: float, calls: int = 1,
+            shared: int = 0, abandoned: int = 0):
+        with self._lock:
+            self.calls += calls
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            self.cost += cost
+            self.shared += shared
+            self.abandoned += abandoned
+
+    def merge(self, other: 'Usage'):
+        self.add(other.input_tokens, other.output_tokens, other.cost, other.calls,
+                 other.shared, other.abandoned)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'input_tokens': self.input_tokens,
+                'output_tokens': self.output_tokens,
+                'cost': round(self.cost, 6),
+                'shared': self.shared,
+                'abandoned': self.abandoned,
+            }
+
+
+_lock = threading.Lock()
+_per_model: Dict[str, Usage] = {}
+# Most recent calls, newest last
+recent_calls = deque(maxlen=200)
+_current_usage: ContextVar[Optional[Usage]] = ContextVar('current_usage', default=None)
+
+
+@contextmanager
+def track_usage():
+    """Collect the usage of every model call made in this context (e.g. one resume)."""
+    usage = Usage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def add_to_current(usage: Usage):
+    """Attribute usage collected elsewhere (e.g. a speculative call) to the current context."""
+    current = _current_usage.get()
+    if current is not None:
+        current.merge(usage)
+
+
+def add_shared(record: Dict[str, Any]):
+    """Charge a call made by another caller, whose result this context shared, to the current context."""
+    current = _current_usage.get()
+    if current is not None:
+        current.add(record['input_tokens'], record['output_tokens'], record['cost'], shared=1)
+
+
+def note_abandoned(calls: int = 1):
+    """Count calls the current context stopped waiting for; their usage lands after it is reported."""
+    current = _current_usage.get()
+    if current is not None:
+        current.add(0, 0, 0.0, calls=0, abandoned=calls)
+
+
+def record_call(model: str, prompt: str, response: Any) -> Dict[str, Any]:
+    """Record one model call, using the API's token counts when it reports them."""
+    reported = getattr(response, 'usage_metadata', None) or {}
+    text = getattr(response, 'content', '') or ''
+    record = {
+        'model': model,
+        'input_tokens': reported.get('input_tokens', estimate_tokens(prompt)),
+        'output_tokens': reported.get('output_tokens', estimate_tokens(text)),
+        'estimated': not reported,
+    }
+    record['cost'] = cost_of(model, record['input_tokens'], record['output_tokens'])
+
+    with _lock:
+        totals = _per_model.setdefault(model, Usage())
+        recent_calls.append(record)
+    totals.add(record['input_tokens'], record['output_tokens'], record['cost'])
+    current = _current_usage.get()
+    if current is not None:
+        current.add(record['input_tokens'], record['output_tokens'], record['cost'])
+    return record
+
+
+def usage_metrics() -> Dict[str, Dict[str, Any]]:
+    """Token and cost totals per model since the process started."""
+    with _lock:
+        return {model: usage.summary() for model, usage in _per_model.items()}
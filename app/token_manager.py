@@ -0,0 +1,128 @@
+import time
+import threading
+from typing import Any, Dict, Optional
+
+# Refresh this many seconds before the ID token expires
+REFRESH_MARGIN = 300
+# Wait this long before retrying a failed background refresh
+RETRY_DELAY = 30
+# Firebase ID tokens live for one hour unless the response says otherwise
+DEFAULT_EXPIRES_IN = 3600
+
+
+class TokenManager:
+    """Keep a Firebase user's ID token fresh using its refresh token."""
+
+    def __init__(self, auth, user: Dict[str, Any], refresh_margin: int = REFRESH_MARGIN):
+        self.auth = auth
+        self.user_id = user['localId']
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._stopped = False
+        self._id_token = ""
+        self._refresh_token = ""
+        self._expires_at = 0.0
+        self._store(user.get('idToken', ''), user.get('refreshToken', ''), user.get('expiresIn'))
+
+    def _store(self, id_token: str, refresh_token: str, expires_in: Any):
+        try:
+            lifetime = int(expires_in)
+        except (TypeError, ValueError):
+            lifetime = DEFAULT_EXPIRES_IN
+        with self._lock:
+            self._id_token = id_token
+            self._refresh_token = refresh_token or self._refresh_token
+            self._expires_at = time.time() + lifetime
+        self._schedule(max(lifetime - self.refresh_margin, 0))
+
+    def _schedule(self, delay: float):
+        with self._lock:
+            # A refresh that finishes after stop() must not start a new timer
+            if self._stopped:
+                return
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(delay, self._background_refresh)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Error refreshing ID token: {str(e)}")
+            if not self.expired():
+                self._schedule(RETRY_DELAY)
+
+    def refresh(self):
+        """Exchange the refresh token for a new ID token."""
+        with self._lock:
+            refresh_token = self._refresh_token
+        tokens = self.auth.refresh(refresh_token)
+        self._store(tokens['idToken'], tokens.get('refreshToken'), tokens.get('expiresIn'))
+
+    def expired(self) -> bool:
+        return time.time() >= self._expires_at
+
+    def seconds_left(self) -> float:
+        return max(self._expires_at - time.time(), 0.0)
+
+    def id_token(self) -> str:
+        """Return a valid ID token, refreshing in-line only if the background refresh missed."""
+        if self.expired():
+            self.refresh()
+        with self._lock:
+            return self._id_token
+
+    def apply(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy the current tokens into a Pyrebase user dict."""
+        with self._lock:
+            user['idToken'] = self._id_token
+            user['refreshToken'] = self._refresh_token
+            user['expiresIn'] = str(int(self.seconds_left()))
+        return user
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+
+# Managers are process-wide so every rerun and tab of a user shares one token
+_lock = threading.Lock()
+_managers: Dict[str, TokenManager] = {}
+
+
+def track_user(auth, user: Dict[str, Any]) -> TokenManager:
+    """Start (or restart) token management for a freshly authenticated user."""
+    manager = TokenManager(auth, user)
+    with _lock:
+        previous = _managers.get(manager.user_id)
+        _managers[manager.user_id] = manager
+    if previous:
+        previous.stop()
+    return manager
+
+
+def sync_user(auth, user: Dict[str, Any]) -> Dict[str, Any]:
+    """Bring a session's user dict up to date with the shared, refreshed tokens."""
+    with _lock:
+        manager = _managers.get(user['localId'])
+    if manager is None:
+        # Process restarted since sign-in; adopt the session's tokens
+        manager = track_user(auth, user)
+    # Refreshes in-line if the background refresh gave up, so a failure is
+    # raised to the caller instead of the session keeping a dead token
+    manager.id_token()
+    return manager.apply(user)
+
+
+def release_user(user_id: str):
+    """Stop refreshing a user's token, e.g. on sign-out."""
+    with _lock:
+        manager = _managers.pop(user_id, None)
+    if manager:
+        manager.stop()
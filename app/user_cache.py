@@ -0,0 +1,139 @@
+import copy
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+# Users whose documents are kept in memory
+MEMORY_CACHE_SIZE = 512
+# A memory entry younger than this is served without asking Firestore
+FRESH_SECONDS = 30.0
+# Per-user record of the Firestore version last seen and the hash of its content
+VERSION_DIR = Path("data") / "cache"
+
+_lock = threading.Lock()
+stats = {'memory': 0, 'validated': 0, 'disk': 0, 'firestore': 0, 'pending': 0, 'offline': 0}
+
+
+class CachedDocument(NamedTuple):
+    document: Dict[str, Any]
+    update_time: Optional[str]
+    cached_at: float
+
+
+_memory: "OrderedDict[str, CachedDocument]" = OrderedDict()
+
+
+def content_hash(document: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(document, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _version_string(update_time: Any) -> Optional[str]:
+    if update_time is None:
+        return None
+    return update_time.isoformat() if hasattr(update_time, 'isoformat') else str(update_time)
+
+
+def _remember(user_id: str, document: Dict[str, Any], update_time: Optional[str]):
+    with _lock:
+        _memory[user_id] = CachedDocument(copy.deepcopy(document), update_time, time.time())
+        _memory.move_to_end(user_id)
+        while len(_memory) > MEMORY_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+def _read_version(user_id: str) -> Optional[Dict[str, str]]:
+    path = VERSION_DIR / f"{user_id}.json"
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_version(user_id: str, update_time: Optional[str], document: Dict[str, Any]):
+    VERSION_DIR.mkdir(parents=True, exist_ok=True)
+    with open(VERSION_DIR / f"{user_id}.json", 'w', encoding='utf-8') as f:
+        json.dump({'update_time': update_time, 'hash': content_hash(document)}, f)
+
+
+def record_remote_write(user_id: str, document: Dict[str, Any], update_time: Any):
+    """Note a document just written to Firestore (called by the outbox after each commit)."""
+    version = _version_string(update_time)
+    _remember(user_id, document, version)
+    _write_version(user_id, version, document)
+
+
+def invalidate(user_id: str):
+    with _lock:
+        _memory.pop(user_id, None)
+
+
+def load_user_document(user_id: str, get_db: Callable[[], Any],
+                       load_snapshot: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """Read-through load of a user's resume document.
+
+    Tiers, in order: a save still queued in the outbox; the in-memory copy if
+    it is fresh or Firestore's update time still matches it; the newest local
+    snapshot if its content is the version Firestore holds; Firestore itself.
+    The update time is checked with a metadata-only read. If Firestore cannot
+    be reached, the best local copy is returned.
+    """
+    from outbox import pending_document
+
+    pending = pending_document(user_id)
+    if pending is not None:
+        stats['pending'] += 1
+        return pending
+
+    with _lock:
+        entry = _memory.get(user_id)
+        if entry:
+            _memory.move_to_end(user_id)
+    if entry and time.time() - entry.cached_at < FRESH_SECONDS:
+        stats['memory'] += 1
+        return copy.deepcopy(entry.document)
+
+    try:
+        reference = get_db().collection("users").document(user_id)
+        # field_paths=[] returns metadata only (existence and update time), not the document
+        metadata = reference.get(field_paths=[])
+    except Exception as e:
+        print(f"Error checking Firestore version for {user_id}: {str(e)}")
+        stats['offline'] += 1
+        return copy.deepcopy(entry.document) if entry else load_snapshot(user_id)
+
+    if not metadata.exists:
+        return load_snapshot(user_id)
+    remote_version = _version_string(metadata.update_time)
+
+    if entry and entry.update_time == remote_version:
+        _remember(user_id, entry.document, remote_version)
+        stats['validated'] += 1
+        return copy.deepcopy(entry.document)
+
+    version = _read_version(user_id)
+    if version and version.get('update_time') == remote_version:
+        snapshot = load_snapshot(user_id)
+        if snapshot is not None and content_hash(snapshot) == version.get('hash'):
+            _remember(user_id, snapshot, remote_version)
+            stats['disk'] += 1
+            return snapshot
+
+    try:
+        doc = reference.get()
+    except Exception as e:
+        print(f"Error fetching Firestore document for {user_id}: {str(e)}")
+        stats['offline'] += 1
+        return copy.deepcopy(entry.document) if entry else load_snapshot(user_id)
+    if not doc.exists:
+        return load_snapshot(user_id)
+    document = doc.to_dict()
+    version_string = _version_string(doc.update_time)
+    _remember(user_id, document, version_string)
+    _write_version(user_id, version_string, document)
+    stats['firestore'] += 1
+    return document
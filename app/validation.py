@@ -0,0 +1,225 @@
+import re
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+# ------------------- Precompiled Patterns -------------------
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+PHONE_PATTERN = re.compile(r'^[\+]?[1-9][\d]{0,15}$')
+URL_PATTERN = re.compile(r'^https?:\/\/(www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b([-a-zA-Z0-9()@:%_\+.~#?&//=]*)$')
+DATE_PATTERN = re.compile(r'^\d{4}(-\d{2})?$')
+# 3.8, 3.8/4.0, 9.14/10 or 85%
+GPA_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)\s*(?:/\s*(\d+(?:\.\d+)?)|(%))?$')
+
+
+def is_email(value: str) -> bool:
+    return EMAIL_PATTERN.match(value) is not None
+
+
+def is_phone(value: str) -> bool:
+    return PHONE_PATTERN.match(value.replace(' ', '').replace('-', '')) is not None
+
+
+def is_url(value: str) -> bool:
+    """Empty URLs are allowed (the fields are optional)"""
+    return not value or URL_PATTERN.match(value) is not None
+
+
+def is_date(value: str) -> bool:
+    """Dates are YYYY-MM, YYYY or 'Present'"""
+    return value.lower() == 'present' or DATE_PATTERN.match(value) is not None
+
+
+def is_year(value: str) -> bool:
+    """Years are YYYY or YYYY-MM"""
+    return DATE_PATTERN.match(value) is not None
+
+
+def is_gpa(value: str) -> bool:
+    """GPA as a number (up to a 10-point scale), out of a scale (x/4, x/10) or a percentage; empty is allowed"""
+    if not value:
+        return True
+    match = GPA_PATTERN.match(value.strip())
+    if match is None:
+        return False
+    score = float(match.group(1))
+    scale = 100.0 if match.group(3) else float(match.group(2) or 10.0)
+    return 0.0 < scale and score <= scale
+
+
+# ------------------- Resume Schema -------------------
+
+# Each section is either an 'object' (personal_info), a 'list' of entries
+# with named fields, or a list of plain 'strings' (skills). Each field may be
+# required and may name a format check with the message shown when it fails.
+RESUME_SCHEMA: Dict[str, Dict[str, Any]] = {
+    'personal_info': {
+        'kind': 'object',
+        'fields': {
+            'full_name': {'required': True},
+            'email': {'required': True, 'check': is_email, 'message': "Please enter a valid email address"},
+            'phone': {'required': True, 'check': is_phone, 'message': "Please enter a valid phone number"},
+            'linkedin': {'check': is_url, 'message': "Please enter a valid LinkedIn URL"},
+            'github': {'check': is_url, 'message': "Please enter a valid GitHub URL"},
+        },
+    },
+    'experience': {
+        'kind': 'list',
+        'fields': {
+            'company': {'required': True},
+            'position': {'required': True},
+            'start_date': {'required': True, 'check': is_date, 'message': "Start date must be YYYY-MM or YYYY"},
+            'end_date': {'check': is_date, 'message': "End date must be YYYY-MM, YYYY or 'Present'"},
+            'technologies': {'required': True},
+        },
+    },
+    'education': {
+        'kind': 'list',
+        'fields': {
+            'institution': {'required': True},
+            'degree': {'required': True},
+            'year': {'required': True, 'check': is_year, 'message': "Graduation year must be YYYY or YYYY-MM"},
+            'gpa': {'check': is_gpa, 'message': "GPA must be like 3.8, 3.8/4.0, 9.1/10 or 85%"},
+        },
+    },
+    'skills': {'kind': 'strings'},
+    'projects': {
+        'kind': 'list',
+        'fields': {
+            'name': {'required': True},
+            'technologies': {'required': True},
+            'url': {'check': is_url, 'message': "Please enter a valid project URL"},
+        },
+    },
+    'certifications': {
+        'kind': 'list',
+        'fields': {
+            'name': {'required': True},
+            'issuer': {'required': True},
+            'date': {'required': True, 'check': is_date, 'message': "Certification date must be YYYY-MM or YYYY"},
+        },
+    },
+    'languages': {
+        'kind': 'list',
+        'fields': {
+            'name': {'required': True},
+            'proficiency': {'required': True},
+        },
+    },
+}
+
+
+class FieldError(NamedTuple):
+    """A single validation problem; index is None for non-list sections."""
+    section: str
+    index: Optional[int]
+    field: str
+    message: str
+
+
+def _check_fields(section: str, index: Optional[int], entry: Dict[str, Any],
+                  fields: Dict[str, Dict[str, Any]]) -> List[FieldError]:
+    errors = []
+    for field, rules in fields.items():
+        value = entry.get(field)
+        if not value:
+            if rules.get('required'):
+                errors.append(FieldError(section, index, field, f"{field.replace('_', ' ').title()} is required"))
+            continue
+        check: Optional[Callable[[str], bool]] = rules.get('check')
+        if check and not check(str(value)):
+            errors.append(FieldError(section, index, field, rules['message']))
+    return errors
+
+
+def validate_section(section: str, value: Any) -> List[FieldError]:
+    """Validate one section of resume data against the schema."""
+    spec = RESUME_SCHEMA.get(section)
+    if spec is None:
+        return []
+    kind = spec['kind']
+    if kind == 'object':
+        if not isinstance(value, dict):
+            return [FieldError(section, None, '', "Section must be an object")]
+        return _check_fields(section, None, value, spec['fields'])
+    if not isinstance(value, list):
+        return [FieldError(section, None, '', "Section must be a list")]
+    errors = []
+    for i, entry in enumerate(value):
+        errors.extend(validate_entry(section, entry, i))
+    return errors
+
+
+def validate_entry(section: str, entry: Any, index: Optional[int] = None) -> List[FieldError]:
+    """Validate a single list entry (e.g. a new experience) before it is added."""
+    spec = RESUME_SCHEMA[section]
+    if spec['kind'] == 'strings':
+        if not isinstance(entry, str) or not entry.strip():
+            return [FieldError(section, index, '', "Entry must be non-empty text")]
+        return []
+    if not isinstance(entry, dict):
+        return [FieldError(section, index, '', "Entry must be an object")]
+    return _check_fields(section, index, entry, spec['fields'])
+
+
+def validate_resume(data: Dict[str, Any], sections: Optional[Iterable[str]] = None) -> List[FieldError]:
+    """Validate a whole resume (or just the named sections) in one pass."""
+    errors = []
+    for section in (sections if sections is not None else RESUME_SCHEMA):
+        errors.extend(validate_section(section, data.get(section, {} if section == 'personal_info' else [])))
+    return errors
+
+
+def errors_by_section(errors: Iterable[FieldError]) -> Dict[str, List[FieldError]]:
+    grouped: Dict[str, List[FieldError]] = {}
+    for error in errors:
+        grouped.setdefault(error.section, []).append(error)
+    return grouped
+
+
+# ------------------- Benchmark -------------------
+
+def _synthetic_resume(entries: int) -> Dict[str, Any]:
+    return {
+        'personal_info': {
+            'full_name': 'John Doe', 'email': 'john.doe@email.com', 'phone': '+1-555-0123',
+            'linkedin': 'https://linkedin.com/in/johndoe', 'github': 'https://github.com/johndoe',
+        },
+        'experience': [{
+            'company': f'Company {i}', 'position': 'Senior Developer', 'start_date': '2020-01',
+            'end_date': 'Present', 'technologies': 'Python, SQL', 'description': 'Built things.',
+        } for i in range(entries)],
+        'education': [{'institution': f'University {i}', 'degree': 'BSc', 'year': '2019', 'gpa': '3.8'}
+                      for i in range(entries)],
+        'skills': [f'Skill {i}' for i in range(entries)],
+        'projects': [{'name': f'Project {i}', 'technologies': 'React', 'url': 'https://github.com/x/y'}
+                     for i in range(entries)],
+        'certifications': [{'name': f'Cert {i}', 'issuer': 'AWS', 'date': '2023-01'} for i in range(entries)],
+        'languages': [{'name': f'Language {i}', 'proficiency': 'Fluent'} for i in range(entries)],
+    }
+
+
+def _legacy_validate(data: Dict[str, Any]) -> int:
+    """Per-call re.match with pattern strings, as the form helpers used to do."""
+    failures = 0
+    personal = data['personal_info']
+    failures += re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', personal['email']) is None
+    failures += re.match(r'^[\+]?[1-9][\d]{0,15}$', personal['phone'].replace(' ', '').replace('-', '')) is None
+    url = r'^https?:\/\/(www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b([-a-zA-Z0-9()@:%_\+.~#?&//=]*)$'
+    for exp in data['experience']:
+        for field in ('start_date', 'end_date'):
+            failures += exp[field].lower() != 'present' and not re.match(r'^\d{4}(-\d{2})?$', exp[field])
+    for project in data['projects']:
+        failures += not re.match(url, project['url'])
+    return failures
+
+
+if __name__ == "__main__":
+    import timeit
+
+    for entries in (10, 100, 1000):
+        resume = _synthetic_resume(entries)
+        runs = max(2000 // entries, 5)
+        legacy = timeit.timeit(lambda: _legacy_validate(resume), number=runs) / runs
+        full = timeit.timeit(lambda: validate_resume(resume), number=runs) / runs
+        print(f"🔹 {entries:>5} entries/section: legacy subset {legacy * 1000:.3f} ms | "
+              f"full schema {full * 1000:.3f} ms")
@@ -0,0 +1,182 @@
+import os
+import io
+import time
+import socket
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import job_queue
+from job_queue import Job
+
+# Worker threads started inside the Streamlit process. Set to 0 when separate
+# `python app/worker.py N` processes do the work, so web and worker capacity
+# are sized independently. Jobs are not preempted, so with two or more the
+# first is kept for interactive work and batch jobs never occupy every worker.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Seconds an idle worker waits before polling the queue again
+POLL_INTERVAL = 1.0
+# Seconds between purges of expired job results
+PURGE_INTERVAL = 300.0
+
+Progress = Callable[[float, str], None]
+
+_generator = None
+_generator_lock = threading.Lock()
+_threads = []
+_threads_lock = threading.Lock()
+
+
+def _get_generator():
+    """One ResumeGenerator per worker process, so parsed stylesheets are reused."""
+    global _generator
+    with _generator_lock:
+        if _generator is None:
+            from resume_generator import ResumeGenerator
+            _generator = ResumeGenerator()
+        return _generator
+
+
+def _render_pdf(job: Job, data: Dict[str, Any]) -> bytes:
+    # render_pdf_bytes raises, so the job records the real error (generate_pdf
+    # reports errors with st.error, which goes nowhere in a worker)
+    generator = _get_generator()
+    template_name = job.payload['template_name']
+    return generator.render_pdf_bytes(
+        generator.render_template(template_name, data, inline_css=False),
+        job.payload['profile'],
+        template_name
+    )
+
+
+def run_preview(job: Job, progress: Progress) -> Tuple[Dict[str, Any], None]:
+    """Gallery thumbnail of one template, written to the shared thumbnail cache."""
+    from thumbnails import render_thumbnail, store_thumbnail
+
+    png = render_thumbnail(_get_generator(), job.payload['template_name'], job.payload['resume_data'])
+    store_thumbnail(job.payload['key'], png)
+    return {'key': job.payload['key']}, None
+
+
+def run_generate(job: Job, progress: Progress) -> Tuple[Dict[str, Any], bytes]:
+    """AI text for the resume, then its PDF."""
+    from generation import generate_resume_text
+
+    data = job.payload['resume_data']
+    progress(0.05, "Writing AI text")
+    report = generate_resume_text(
+        data, job.payload['mode'],
+        on_progress=lambda done, total: progress(0.05 + 0.65 * done / total, f"Wrote {done} of {total} sections")
+    )
+    progress(0.75, "Laying out the PDF")
+    return {'resume_data': data, 'report': report}, _render_pdf(job, data)
+
+
+def run_render(job: Job, progress: Progress) -> Tuple[Dict[str, Any], bytes]:
+    """PDF of the resume as it is, in one template (Generate when no AI text is needed)."""
+    progress(0.1, "Laying out the PDF")
+    return {}, _render_pdf(job, job.payload['resume_data'])
+
+
+def run_export(job: Job, progress: Progress) -> Tuple[Dict[str, Any], bytes]:
+    """PDFs in every template, bundled as a zip; fails only if no template renders."""
+    from resume_generator import zip_pdfs
+
+    progress(0.1, "Rendering all templates")
+    pdfs, errors = _get_generator().render_all_templates(job.payload['resume_data'], job.payload['profile'])
+    if not pdfs:
+        raise RuntimeError("No template could be rendered: "
+                           + "; ".join(f"{name}: {error}" for name, error in errors.items()))
+    # A partial bundle records which templates failed and why
+    return {'templates': list(pdfs), 'errors': errors}, zip_pdfs(pdfs)
+
+
+# Job kind -> handler returning (result, output file bytes or None)
+HANDLERS: Dict[str, Callable[[Job, Progress], Tuple[Dict[str, Any], Optional[bytes]]]] = {
+    "preview": run_preview,
+    "generate": run_generate,
+    "render": run_render,
+    "export": run_export,
+}
+
+
+def export_pdfs(job_id: str) -> Dict[str, bytes]:
+    """Unpack the zip of a finished export job into PDF bytes per template."""
+    import zipfile
+
+    output = job_queue.result_bytes(job_id)
+    if output is None:
+        return {}
+    pdfs = {}
+    with zipfile.ZipFile(io.BytesIO(output)) as archive:
+        for name in archive.namelist():
+            pdfs[Path(name).stem.rsplit('_', 1)[-1]] = archive.read(name)
+    return pdfs
+
+
+def execute(job: Job):
+    """Run one claimed job and record its outcome."""
+    handler = HANDLERS.get(job.kind)
+    if handler is None:
+        job_queue.fail(job.id, f"Job kind '{job.kind}' not found")
+        return
+    try:
+        result, output = handler(job, lambda fraction, message="": job_queue.report_progress(job.id, fraction, message))
+        job_queue.complete(job.id, result, output)
+    except Exception as e:
+        print(f"Error running {job.kind} job {job.id}: {str(e)}")
+        job_queue.fail(job.id, str(e))
+
+
+def run_worker(name: Optional[str] = None, stop: Optional[threading.Event] = None, lowest: str = "batch"):
+    """Claim and run jobs until stopped, skipping priority classes below `lowest`."""
+    name = name or f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+    last_purge = 0.0
+    while stop is None or not stop.is_set():
+        try:
+            if time.time() - last_purge > PURGE_INTERVAL:
+                job_queue.purge_expired()
+                last_purge = time.time()
+            job = job_queue.claim(name, lowest)
+            if job is None:
+                job_queue.wait_for_work(POLL_INTERVAL)
+                continue
+            execute(job)
+        except Exception as e:
+            print(f"Error in job worker {name}: {str(e)}")
+            time.sleep(POLL_INTERVAL)
+
+
+def start_in_process_workers(count: int = JOB_WORKERS):
+    """Start worker threads in this process, once per process."""
+    with _threads_lock:
+        while len(_threads) < count:
+            lowest = "pdf" if count > 1 and not _threads else "batch"
+            thread = threading.Thread(target=run_worker, kwargs={'lowest': lowest},
+                                      name=f"job-worker-{len(_threads)}", daemon=True)
+            thread.start()
+            _threads.append(thread)
+
+
+if __name__ == "__main__":
+    # Dedicated workers, run from the project root:
+    #   python app/worker.py [processes] [--interactive]
+    # --interactive leaves batch jobs to other workers
+    import sys
+    import multiprocessing
+
+    processes = int(next((arg for arg in sys.argv[1:] if arg.isdigit()), max(1, (os.cpu_count() or 2) // 2)))
+    lowest = "pdf" if "--interactive" in sys.argv else "batch"
+    context = multiprocessing.get_context("spawn")
+    # Not daemonic: export jobs start render processes of their own
+    workers = [context.Process(target=run_worker, kwargs={'lowest': lowest}, name=f"job-worker-{i}")
+               for i in range(processes)]
+    for process in workers:
+        process.start()
+    print(f"🔹 {processes} job worker process(es) running; queue: {job_queue.queue_metrics()}")
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        for process in workers:
+            process.terminate()